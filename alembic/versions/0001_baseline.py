@@ -0,0 +1,109 @@
+"""baseline schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+Databases created before migrations existed already have these tables (the
+app used to rely on ``create_all``), so each table is only created when it is
+missing and the revision can be applied to both fresh and existing databases.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps():
+    return [
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    ]
+
+
+def _listing_columns():
+    return [
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("sector", sa.String(50), nullable=False),
+        sa.Column("city", sa.String(50), nullable=False),
+        sa.Column("location", sa.String(100), nullable=False),
+        sa.Column("image", sa.String(255)),
+        sa.Column("description", sa.Text()),
+        sa.Column("address", sa.Text(), nullable=False),
+        sa.Column("phone", sa.String(20), nullable=False),
+        sa.Column("email", sa.String(100), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("username", sa.String(50), nullable=False, unique=True),
+            sa.Column("password_hash", sa.String(255), nullable=False),
+            sa.Column("type", sa.String(10), nullable=False),
+            sa.Column("is_active", sa.Boolean()),
+            *_timestamps(),
+        )
+
+    if "stores" not in existing:
+        op.create_table(
+            "stores",
+            sa.Column("id", sa.String(36), primary_key=True),
+            *_listing_columns(),
+            sa.Column("owner_id", sa.String(36), sa.ForeignKey("users.id", ondelete="CASCADE")),
+            sa.Column("products", sa.Text()),
+            sa.Column("is_active", sa.Boolean()),
+            *_timestamps(),
+        )
+
+    if "offers" not in existing:
+        op.create_table(
+            "offers",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("title", sa.String(100), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("discount_percentage", sa.Integer(), nullable=False),
+            sa.Column("image", sa.String(255)),
+            sa.Column("valid_until", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("store_id", sa.String(36), sa.ForeignKey("stores.id", ondelete="CASCADE")),
+            sa.Column("is_active", sa.Boolean()),
+            *_timestamps(),
+        )
+
+    if "subscriptions" not in existing:
+        op.create_table(
+            "subscriptions",
+            sa.Column("id", sa.String(36), primary_key=True),
+            *_listing_columns(),
+            sa.Column("user_id", sa.String(36), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=True),
+            sa.Column("products", sa.Text()),
+            sa.Column("status", sa.String(20)),
+            *_timestamps(),
+        )
+
+    if "entity_counters" not in existing:
+        op.create_table(
+            "entity_counters",
+            sa.Column("scope", sa.String(36), primary_key=True),
+            sa.Column("total_stores", sa.Integer(), nullable=False),
+            sa.Column("active_stores", sa.Integer(), nullable=False),
+            sa.Column("total_offers", sa.Integer(), nullable=False),
+            sa.Column("active_offers", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+
+def downgrade() -> None:
+    for table in ("entity_counters", "subscriptions", "offers", "stores", "users"):
+        op.drop_table(table)
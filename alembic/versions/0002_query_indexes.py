@@ -0,0 +1,44 @@
+"""composite indexes for the list and dashboard filters
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+Each index leads with the equality predicate a router applies and ends with
+the (created_at, id) listing order, so the filter and the ORDER BY/keyset
+seek are served by the same index.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_stores_created_at_id", "stores", ["created_at", "id"]),
+    ("ix_stores_owner_id_created_at", "stores", ["owner_id", "created_at", "id"]),
+    ("ix_stores_city_created_at", "stores", ["city", "created_at", "id"]),
+    ("ix_stores_sector_created_at", "stores", ["sector", "created_at", "id"]),
+    ("ix_offers_created_at_id", "offers", ["created_at", "id"]),
+    ("ix_offers_store_id_is_active_created_at", "offers", ["store_id", "is_active", "created_at", "id"]),
+    ("ix_offers_is_active_created_at", "offers", ["is_active", "created_at", "id"]),
+    ("ix_subscriptions_created_at_id", "subscriptions", ["created_at", "id"]),
+    ("ix_subscriptions_email", "subscriptions", ["email"]),
+    ("ix_subscriptions_status_created_at", "subscriptions", ["status", "created_at", "id"]),
+    ("ix_subscriptions_user_id_created_at", "subscriptions", ["user_id", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,82 @@
+"""store and subscription products in their own tables
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+Moves the comma-joined ``products`` text columns into ``store_products`` and
+``subscription_products`` (one row per product, ordered by ``position``) and
+drops the old columns. ``create_all`` may already have created the new tables
+at startup, so creation and the data copy are each skipped when done.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (owner table, product table, foreign key column)
+PRODUCT_TABLES = [
+    ("stores", "store_products", "store_id"),
+    ("subscriptions", "subscription_products", "subscription_id"),
+]
+
+
+def _product_table(name, key):
+    return sa.table(name, sa.column(key, sa.String), sa.column("position", sa.Integer), sa.column("name", sa.String))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing = set(inspector.get_table_names())
+
+    for owner, table, key in PRODUCT_TABLES:
+        if table not in existing:
+            op.create_table(
+                table,
+                sa.Column(key, sa.String(36), sa.ForeignKey(f"{owner}.id", ondelete="CASCADE"), primary_key=True),
+                sa.Column("position", sa.Integer(), primary_key=True),
+                sa.Column("name", sa.String(255), nullable=False),
+            )
+
+        if "products" not in {column["name"] for column in inspector.get_columns(owner)}:
+            continue
+
+        rows = bind.execute(sa.text(f"SELECT id, products FROM {owner} WHERE products IS NOT NULL AND products != ''"))
+        products = [
+            {key: row_id, "position": position, "name": name}
+            for row_id, joined in rows
+            for position, name in enumerate(joined.split(","))
+        ]
+        if products:
+            op.bulk_insert(_product_table(table, key), products)
+
+        with op.batch_alter_table(owner) as batch:
+            batch.drop_column("products")
+
+    op.create_index("ix_store_products_name_store_id", "store_products", ["name", "store_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    op.drop_index("ix_store_products_name_store_id", table_name="store_products", if_exists=True)
+
+    for owner, table, key in PRODUCT_TABLES:
+        with op.batch_alter_table(owner) as batch:
+            batch.add_column(sa.Column("products", sa.Text()))
+
+        joined = {}
+        for row_id, name in bind.execute(sa.text(f"SELECT {key}, name FROM {table} ORDER BY {key}, position")):
+            joined.setdefault(row_id, []).append(name)
+        owner_table = sa.table(owner, sa.column("id", sa.String), sa.column("products", sa.Text))
+        for row_id, names in joined.items():
+            bind.execute(owner_table.update().where(owner_table.c.id == row_id).values(products=",".join(names)))
+
+        op.drop_table(table)
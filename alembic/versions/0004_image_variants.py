@@ -0,0 +1,37 @@
+"""image variant lookup table
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+One row per generated derivative of an uploaded image (``source`` is the
+original's filename), so responses can list the variants without touching the
+filesystem. ``create_all`` may already have created it at startup.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "image_variants" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "image_variants",
+        sa.Column("source", sa.String(255), primary_key=True),
+        sa.Column("width", sa.Integer(), primary_key=True),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("image_variants")
@@ -0,0 +1,36 @@
+"""indexes on the image columns
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+Uploads are content-addressed and shared between rows, so a blob is only
+deleted once no store, offer or subscription references it. These indexes keep
+that reference check (and ``app.cli gc-uploads``) off sequential scans.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_stores_image", "stores", ["image"]),
+    ("ix_offers_image", "offers", ["image"]),
+    ("ix_subscriptions_image", "subscriptions", ["image"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
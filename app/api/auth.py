@@ -1,17 +1,30 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import authenticate_user, create_access_token, get_current_active_user, get_password_hash
+from app.core.database import DatabaseRoute, get_db, run_db
+from app.core.security import (
+    authenticate_user_async,
+    create_access_token,
+    get_current_active_user,
+    get_user_by_username,
+    password_hasher,
+)
 from app.models import User
 from app.schemas.user import UserCreate, UserLogin, PhoneLogin, Token, UserResponse
 from app.core.config import settings
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+router = APIRouter(prefix="/auth", tags=["authentication"], route_class=DatabaseRoute)
+
+def _create_user(db: Session, username: str, password_hash: str, user_type: str) -> User:
+    db_user = User(username=username, password_hash=password_hash, type=user_type)
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+    user = await authenticate_user_async(db, user_credentials.username, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -29,21 +42,18 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     }
 
 @router.post("/login-phone", response_model=Token)
-def login_with_phone(payload: PhoneLogin, db: Session = Depends(get_db)):
+async def login_with_phone(payload: PhoneLogin, db: Session = Depends(get_db)):
     if not settings.allow_phone_admin_login:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Phone login is disabled")
 
     # Ensure admin user exists
-    admin = db.query(User).filter(User.username == settings.admin_username).first()
+    admin = await run_db(db, get_user_by_username, settings.admin_username)
     if not admin:
-        hashed = get_password_hash(settings.admin_password)
-        admin = User(username=settings.admin_username, password_hash=hashed, type="admin")
-        db.add(admin)
-        db.commit()
-        db.refresh(admin)
+        hashed = await password_hasher.hash(settings.admin_password)
+        await run_db(db, _create_user, settings.admin_username, hashed, "admin")
 
     # Authenticate with configured admin credentials
-    user = authenticate_user(db, settings.admin_username, settings.admin_password)
+    user = await authenticate_user_async(db, settings.admin_username, settings.admin_password)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Admin credentials invalid")
 
@@ -62,21 +72,14 @@ def logout(current_user: User = Depends(get_current_active_user)):
     return {"message": "Successfully logged out"}
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.username == user.username).first()
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    existing_user = await run_db(db, get_user_by_username, user.username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        username=user.username,
-        password_hash=hashed_password,
-        type=user.type
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    hashed_password = await password_hasher.hash(user.password)
+    db_user = await run_db(db, _create_user, user.username, hashed_password, user.type)
     return UserResponse.from_orm(db_user)
@@ -1,57 +1,51 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.core.database import get_db
+from app.core.counters import read_counters
+from app.core.database import DatabaseRoute, get_db, run_db
+from app.core.images import image_srcsets
 from app.core.security import get_current_active_user
 from app.models import User, Store, Offer
 from app.schemas import DashboardStats
-from app.schemas.store import StoreResponse
-from app.schemas.offer import OfferResponse
+from app.api.offers import offer_rows_query, owned_store_ids
+from app.utils.cache import dashboard_cache, run_cache
+from app.utils.serialization import json_response, offer_response, store_response
 
-router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+router = APIRouter(prefix="/dashboard", tags=["dashboard"], route_class=DatabaseRoute)
+
+def _dashboard_payload(db: Session, current_user: User) -> dict:
+    store_filters = []
+    offer_filters = []
+    if current_user.type == "store":
+        store_filters.append(Store.owner_id == current_user.id)
+        offer_filters.append(Offer.store_id.in_(owned_store_ids(current_user.id)))
+    
+    counts = read_counters(db, current_user.id if current_user.type == "store" else None)
+    
+    recent_stores = db.query(Store).filter(*store_filters).order_by(Store.created_at.desc()).limit(5).all()
+    recent_offers = offer_rows_query(db).filter(*offer_filters).order_by(Offer.created_at.desc()).limit(5).all()
+    srcsets = image_srcsets(db, [row.image for row in recent_stores + recent_offers])
+    
+    stats = DashboardStats.model_construct(
+        total_stores=counts["total_stores"],
+        active_stores=counts["active_stores"],
+        total_offers=counts["total_offers"],
+        active_offers=counts["active_offers"],
+        recent_stores=[store_response(store, srcsets) for store in recent_stores],
+        recent_offers=[offer_response(row, srcsets=srcsets) for row in recent_offers]
+    )
+    return stats.model_dump(mode="json")
 
 @router.get("/stats", response_model=DashboardStats)
-def get_dashboard_stats(
+async def get_dashboard_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    if current_user.type == "store":
-        user_stores = db.query(Store).filter(Store.owner_id == current_user.id).all()
-        store_ids = [store.id for store in user_stores]
-        
-        total_stores = len(user_stores)
-        active_stores = len([s for s in user_stores if s.is_active])
-        
-        total_offers = db.query(Offer).filter(Offer.store_id.in_(store_ids)).count()
-        active_offers = db.query(Offer).filter(
-            Offer.store_id.in_(store_ids),
-            Offer.is_active == True
-        ).count()
-        
-        recent_stores = user_stores[-5:] if len(user_stores) > 5 else user_stores
-        recent_offers = db.query(Offer).filter(
-            Offer.store_id.in_(store_ids)
-        ).order_by(Offer.created_at.desc()).limit(5).all()
-    else:
-        total_stores = db.query(Store).count()
-        active_stores = db.query(Store).filter(Store.is_active == True).count()
-        total_offers = db.query(Offer).count()
-        active_offers = db.query(Offer).filter(Offer.is_active == True).count()
-        
-        recent_stores = db.query(Store).order_by(Store.created_at.desc()).limit(5).all()
-        recent_offers = db.query(Offer).order_by(Offer.created_at.desc()).limit(5).all()
+    # Everyone but store owners sees the same global numbers, so they share an entry.
+    cache_key = current_user.id if current_user.type == "store" else "all"
+    cached = await run_cache(dashboard_cache.get, cache_key)
+    if cached is not None:
+        return json_response(cached)
     
-    store_responses = []
-    for store in recent_stores:
-        store_dict = StoreResponse.from_orm(store).dict()
-        store_dict["products"] = store.products.split(",") if store.products else []
-        store_responses.append(StoreResponse(**store_dict))
-    
-    return DashboardStats(
-        total_stores=total_stores,
-        active_stores=active_stores,
-        total_offers=total_offers,
-        active_offers=active_offers,
-        recent_stores=store_responses,
-        recent_offers=[OfferResponse.from_orm(offer) for offer in recent_offers]
-    )
+    payload = await run_db(db, _dashboard_payload, current_user)
+    await run_cache(dashboard_cache.set, cache_key, payload)
+    return json_response(payload)
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.core.database import DatabaseRoute, pool_status
+from app.core.security import get_current_active_user, password_hasher, principal_cache, token_cache
+from app.models import User
+from app.utils.cache import dashboard_cache
+
+router = APIRouter(prefix="/internal", tags=["internal"], route_class=DatabaseRoute)
+
+async def require_admin(current_user: User = Depends(get_current_active_user)):
+    if current_user.type != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can access internal endpoints")
+    return current_user
+
+@router.get("/pool")
+def get_pool_status(current_user: User = Depends(require_admin)):
+    return {**pool_status(), "password_hasher": password_hasher.stats()}
+
+
+@router.get("/caches")
+def get_cache_stats(current_user: User = Depends(require_admin)):
+    return {
+        "token": token_cache.stats(),
+        "principal": principal_cache.stats(),
+        "dashboard": dashboard_cache.stats(),
+    }
@@ -1,82 +1,325 @@
-from typing import Optional
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from app.core.database import get_db
+from sqlalchemy import delete, insert, select
+from app.core.config import settings
+from app.core.counters import active_delta, adjust_counters
+from app.core.database import DatabaseRoute, get_db, run_db
+from app.core.images import image_srcsets
+from app.core.search import search_index
 from app.core.security import get_current_active_user
+from app.utils.cache import invalidate_dashboard_stats
 from app.models import User, Offer, Store
-from app.schemas.offer import OfferCreate, OfferUpdate, OfferResponse, OfferListResponse
+from app.schemas.offer import (
+    OfferCreate, OfferUpdate, OfferResponse, OfferListResponse,
+    OfferBulkCreate, OfferBulkUpdate, OfferBulkDelete, BulkItemResult, BulkResponse,
+)
+from app.utils.export import EXPORT_FORMAT_PATTERN, export_response
+from app.utils.helpers import release_images
+from app.utils.pagination import TOTAL_MODE_PATTERN, count_total, paginate
+from app.utils.serialization import offer_response, render
 
-router = APIRouter(prefix="/offers", tags=["offers"])
+router = APIRouter(prefix="/offers", tags=["offers"], route_class=DatabaseRoute)
+
+OFFER_COLUMNS = (
+    Offer.id,
+    Offer.title,
+    Offer.description,
+    Offer.discount_percentage,
+    Offer.image,
+    Offer.valid_until,
+    Offer.store_id,
+    Offer.is_active,
+    Offer.created_at,
+    Offer.updated_at,
+)
+
+def owned_store_ids(user_id: str):
+    return select(Store.id).where(Store.owner_id == user_id).correlate(None)
+
+def offer_rows_query(db: Session):
+    """Offer columns plus the owning store's name in a single joined SELECT."""
+    return db.query(*OFFER_COLUMNS, Store.name.label("store_name")).outerjoin(
+        Store, Store.id == Offer.store_id
+    )
+
+def offer_filters(current_user: User, store_id: Optional[str] = None, active_only: bool = True):
+    filters = []
+    
+    if current_user.type == "store":
+        filters.append(Offer.store_id.in_(owned_store_ids(current_user.id)))
+    
+    if store_id:
+        filters.append(Offer.store_id == store_id)
+    
+    if active_only:
+        filters.append(Offer.is_active == True)
+    
+    return filters
+
+def _store_owner_id(db: Session, store_id: Optional[str]) -> Optional[str]:
+    if store_id is None:
+        return None
+    return db.query(Store.owner_id).filter(Store.id == store_id).scalar()
+
+def _offer_page(db: Session, current_user: User, page, limit, search, store_id, active_only, cursor, total_mode):
+    filters = offer_filters(current_user, store_id, active_only)
+    count_query = db.query(Offer.id).filter(*filters)
+    rows_query = offer_rows_query(db).filter(*filters)
+    rank = None
+    if search:
+        count_query, _ = search_index.search(count_query, Offer, search)
+        rows_query, rank = search_index.search(rows_query, Offer, search)
+    
+    total = count_total(count_query, total_mode)
+    rows, next_cursor = paginate(rows_query, Offer, page, limit, cursor, rank)
+    srcsets = image_srcsets(db, (row.image for row in rows))
+    
+    return OfferListResponse.model_construct(
+        offers=[offer_response(row, srcsets=srcsets) for row in rows],
+        total=total,
+        page=page,
+        limit=limit,
+        next_cursor=next_cursor
+    )
 
 @router.get("/", response_model=OfferListResponse)
-def get_offers(
+async def get_offers(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     search: Optional[str] = Query(None),
     store_id: Optional[str] = Query(None),
     active_only: bool = Query(True),
+    cursor: Optional[str] = Query(None),
+    total_mode: str = Query("exact", pattern=TOTAL_MODE_PATTERN),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    query = db.query(Offer)
-    
-    if current_user.type == "store":
-        user_stores = db.query(Store).filter(Store.owner_id == current_user.id).all()
-        store_ids = [store.id for store in user_stores]
-        query = query.filter(Offer.store_id.in_(store_ids))
+    # Only SQL in here, so with an async driver it runs on the event loop.
+    offers = await run_db(
+        db, _offer_page, current_user, page, limit, search, store_id, active_only, cursor or None, total_mode
+    )
+    return render(offers)
+
+@router.get("/export")
+def export_offers(
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    search: Optional[str] = Query(None),
+    store_id: Optional[str] = Query(None),
+    active_only: bool = Query(True),
+    current_user: User = Depends(get_current_active_user)
+):
+    def build_query(db):
+        query = offer_rows_query(db).filter(*offer_filters(current_user, store_id, active_only))
+        if search:
+            query, _ = search_index.search(query, Offer, search)
+        return query.order_by(Offer.created_at.desc(), Offer.id.desc())
     
-    if store_id:
-        query = query.filter(Offer.store_id == store_id)
+    return export_response(build_query, offer_response, OfferResponse, format, "offers")
+
+def _chunks(items, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _item_error(index: int, detail: str, offer_id: Optional[str] = None) -> BulkItemResult:
+    return BulkItemResult.model_construct(index=index, id=offer_id, status="error", detail=detail)
+
+def _apply_chunk(db: Session, chunk, apply) -> Dict[int, str]:
+    """Run ``apply(db, chunk)`` and commit; returns the failed items' errors by index.
+
+    When the chunk fails as a whole, each item is retried in its own SAVEPOINT,
+    so only the items the database rejects fail, each with its own reason.
+    """
+    try:
+        apply(db, chunk)
+        db.commit()
+        return {}
+    except SQLAlchemyError:
+        db.rollback()
+    errors = {}
+    for item in chunk:
+        try:
+            with db.begin_nested():
+                apply(db, [item])
+        except SQLAlchemyError as exc:
+            errors[item[0]] = str(getattr(exc, "orig", None) or exc)
+    db.commit()
+    return errors
+
+def _bulk_response(results):
+    results.sort(key=lambda result: result.index)
+    failed = sum(1 for result in results if result.status == "error")
+    if failed < len(results):
+        invalidate_dashboard_stats()
+    return render(BulkResponse.model_construct(succeeded=len(results) - failed, failed=failed, results=results))
+
+def _owned_offer_rows(db: Session, offer_ids, *columns):
+    """The requested offers with their store's owner, in one joined SELECT."""
+    query = db.query(Offer.id, Offer.is_active, Store.owner_id, *columns).outerjoin(
+        Store, Store.id == Offer.store_id
+    )
+    return {row.id: row for row in query.filter(Offer.id.in_(set(offer_ids)))}
+
+def _check_offer(current_user: User, rows, seen, offer_id: str) -> Optional[str]:
+    if offer_id in seen:
+        return "Duplicate offer id in request"
+    seen.add(offer_id)
+    row = rows.get(offer_id)
+    if row is None:
+        return "Offer not found"
+    if current_user.type == "store" and row.owner_id != current_user.id:
+        return "Not enough permissions"
+    return None
+
+def _insert_offers(db: Session, chunk) -> None:
+    mappings = [values for _, _, values in chunk]
+    db.execute(insert(Offer), mappings)
+    for owner_id, created in Counter(owner_id for _, owner_id, _ in chunk).items():
+        adjust_counters(db, owner_id, total_offers=created, active_offers=created)
+    search_index.index_mappings(db, Offer, mappings)
+
+@router.post("/bulk", response_model=BulkResponse)
+def bulk_create_offers(
+    payload: OfferBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create many offers; each chunk of ``bulk_chunk_size`` commits on its own."""
+    store_ids = {item.store_id for item in payload.offers}
+    stores = {
+        row.id: row
+        for row in db.query(Store.id, Store.owner_id).filter(Store.id.in_(store_ids))
+    }
     
-    if active_only:
-        query = query.filter(Offer.is_active == True)
+    results, pending = [], []
+    for index, item in enumerate(payload.offers):
+        store = stores.get(item.store_id)
+        if store is None:
+            results.append(_item_error(index, "Store not found"))
+        elif current_user.type == "store" and store.owner_id != current_user.id:
+            results.append(_item_error(index, "Not enough permissions"))
+        else:
+            pending.append((index, store.owner_id, {"id": str(uuid.uuid4()), "is_active": True, **item.dict()}))
     
-    if search:
-        query = query.filter(
-            or_(
-                Offer.title.ilike(f"%{search}%"),
-                Offer.description.ilike(f"%{search}%")
-            )
+    for chunk in _chunks(pending, settings.bulk_chunk_size):
+        errors = _apply_chunk(db, chunk, _insert_offers)
+        results.extend(
+            _item_error(index, f"Could not save offer: {errors[index]}") if index in errors
+            else BulkItemResult.model_construct(index=index, id=values["id"], status="created")
+            for index, _, values in chunk
         )
     
-    total = query.count()
-    offers = query.offset((page - 1) * limit).limit(limit).all()
+    return _bulk_response(results)
+
+def _update_offers(db: Session, chunk) -> None:
+    db.bulk_update_mappings(Offer, [values for _, _, values in chunk])
+    deltas = Counter()
+    for _, row, values in chunk:
+        deltas[row.owner_id] += active_delta(row.is_active, values.get("is_active", row.is_active))
+    for owner_id, delta in deltas.items():
+        adjust_counters(db, owner_id, active_offers=delta)
+    search_index.index_mappings(db, Offer, [
+        {
+            "id": row.id,
+            "title": values.get("title", row.title),
+            "description": values.get("description", row.description),
+        }
+        for _, row, values in chunk
+        if "title" in values or "description" in values
+    ])
+
+@router.patch("/bulk", response_model=BulkResponse)
+def bulk_update_offers(
+    payload: OfferBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    rows = _owned_offer_rows(db, (item.id for item in payload.offers), Offer.title, Offer.description, Offer.image)
+    
+    results, pending, seen = [], [], set()
+    updated_at = datetime.now(timezone.utc)
+    for index, item in enumerate(payload.offers):
+        error = _check_offer(current_user, rows, seen, item.id)
+        if error:
+            results.append(_item_error(index, error, item.id))
+            continue
+        changes = item.dict(exclude_unset=True, exclude={"id"})
+        pending.append((index, rows[item.id], {"id": item.id, **changes, "updated_at": updated_at}))
     
-    offer_responses = []
-    for offer in offers:
-        offer_dict = OfferResponse.from_orm(offer).dict()
-        store = db.query(Store).filter(Store.id == offer.store_id).first()
-        offer_dict["store_name"] = store.name if store else None
-        offer_responses.append(OfferResponse(**offer_dict))
+    for chunk in _chunks(pending, settings.bulk_chunk_size):
+        errors = _apply_chunk(db, chunk, _update_offers)
+        saved = [(index, row, values) for index, row, values in chunk if index not in errors]
+        release_images(db, (row.image for _, row, values in saved if values.get("image", row.image) != row.image))
+        results.extend(
+            _item_error(index, f"Could not update offer: {errors[index]}", row.id) if index in errors
+            else BulkItemResult.model_construct(index=index, id=row.id, status="updated")
+            for index, row, _ in chunk
+        )
     
-    return OfferListResponse(
-        offers=offer_responses,
-        total=total,
-        page=page,
-        limit=limit
-    )
+    return _bulk_response(results)
 
-@router.get("/{offer_id}", response_model=OfferResponse)
-def get_offer(
-    offer_id: str,
+def _delete_offers(db: Session, chunk) -> None:
+    offer_ids = [row.id for _, row in chunk]
+    db.execute(delete(Offer).where(Offer.id.in_(offer_ids)).execution_options(synchronize_session=False))
+    removed, active = Counter(), Counter()
+    for _, row in chunk:
+        removed[row.owner_id] += 1
+        active[row.owner_id] += int(row.is_active is True)
+    for owner_id in removed:
+        adjust_counters(db, owner_id, total_offers=-removed[owner_id], active_offers=-active[owner_id])
+    search_index.remove_ids(db, Offer, offer_ids)
+
+@router.delete("/bulk", response_model=BulkResponse)
+def bulk_delete_offers(
+    payload: OfferBulkDelete,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    rows = _owned_offer_rows(db, payload.ids, Offer.image)
+    
+    results, pending, seen = [], [], set()
+    for index, offer_id in enumerate(payload.ids):
+        error = _check_offer(current_user, rows, seen, offer_id)
+        if error:
+            results.append(_item_error(index, error, offer_id))
+        else:
+            pending.append((index, rows[offer_id]))
+    
+    for chunk in _chunks(pending, settings.bulk_chunk_size):
+        errors = _apply_chunk(db, chunk, _delete_offers)
+        release_images(db, (row.image for index, row in chunk if index not in errors))
+        results.extend(
+            _item_error(index, f"Could not delete offer: {errors[index]}", row.id) if index in errors
+            else BulkItemResult.model_construct(index=index, id=row.id, status="deleted")
+            for index, row in chunk
+        )
+    
+    return _bulk_response(results)
+
+def _offer_detail(db: Session, current_user: User, offer_id: str):
     offer = db.query(Offer).filter(Offer.id == offer_id).first()
     if not offer:
         raise HTTPException(status_code=404, detail="Offer not found")
     
-    if current_user.type == "store":
-        store = db.query(Store).filter(Store.id == offer.store_id).first()
-        if not store or store.owner_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not enough permissions")
-    
-    offer_dict = OfferResponse.from_orm(offer).dict()
     store = db.query(Store).filter(Store.id == offer.store_id).first()
-    offer_dict["store_name"] = store.name if store else None
+    if current_user.type == "store" and (not store or store.owner_id != current_user.id):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    return OfferResponse(**offer_dict)
+    return offer_response(
+        offer, store_name=store.name if store else None, srcsets=image_srcsets(db, [offer.image])
+    )
+
+@router.get("/{offer_id}", response_model=OfferResponse)
+async def get_offer(
+    offer_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    return render(await run_db(db, _offer_detail, current_user, offer_id))
 
 @router.post("/", response_model=OfferResponse)
 def create_offer(
@@ -93,12 +336,13 @@ def create_offer(
     
     db_offer = Offer(**offer.dict())
     db.add(db_offer)
+    db.flush()
+    adjust_counters(db, store.owner_id, total_offers=1, active_offers=active_delta(None, db_offer.is_active))
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(db_offer)
     
-    offer_dict = OfferResponse.from_orm(db_offer).dict()
-    offer_dict["store_name"] = store.name
-    return OfferResponse(**offer_dict)
+    return render(offer_response(db_offer, store_name=store.name, srcsets=image_srcsets(db, [db_offer.image])))
 
 @router.put("/{offer_id}", response_model=OfferResponse)
 def update_offer(
@@ -117,17 +361,22 @@ def update_offer(
             raise HTTPException(status_code=403, detail="Not enough permissions")
     
     update_data = offer_update.dict(exclude_unset=True)
+    was_active = offer.is_active
+    old_image = offer.image
     for field, value in update_data.items():
         setattr(offer, field, value)
     
+    delta = active_delta(was_active, offer.is_active)
+    if delta:
+        adjust_counters(db, _store_owner_id(db, offer.store_id), active_offers=delta)
     db.commit()
+    invalidate_dashboard_stats()
+    if offer.image != old_image:
+        release_images(db, [old_image])
     db.refresh(offer)
     
-    offer_dict = OfferResponse.from_orm(offer).dict()
-    store = db.query(Store).filter(Store.id == offer.store_id).first()
-    offer_dict["store_name"] = store.name if store else None
-    
-    return OfferResponse(**offer_dict)
+    store_name = db.query(Store.name).filter(Store.id == offer.store_id).scalar()
+    return render(offer_response(offer, store_name=store_name, srcsets=image_srcsets(db, [offer.image])))
 
 @router.delete("/{offer_id}")
 def delete_offer(
@@ -144,6 +393,12 @@ def delete_offer(
         if not store or store.owner_id != current_user.id:
             raise HTTPException(status_code=403, detail="Not enough permissions")
     
+    adjust_counters(
+        db, _store_owner_id(db, offer.store_id), total_offers=-1, active_offers=-int(offer.is_active is True)
+    )
+    image = offer.image
     db.delete(offer)
     db.commit()
+    invalidate_dashboard_stats()
+    release_images(db, [image])
     return {"message": "Offer deleted successfully"}
@@ -1,36 +1,30 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from app.core.database import get_db
+from sqlalchemy import case, func, select
+from app.core.counters import active_delta, adjust_counters
+from app.core.database import DatabaseRoute, get_db, run_db
+from app.core.images import image_srcsets
+from app.core.search import search_index
 from app.core.security import get_current_active_user
-from app.models import User, Store
+from app.utils.cache import invalidate_dashboard_stats
+from app.models import User, Store, Offer, StoreProduct
 from app.schemas.store import StoreCreate, StoreUpdate, StoreResponse, StoreListResponse
+from app.utils.export import EXPORT_FORMAT_PATTERN, export_response
+from app.utils.helpers import release_images
+from app.utils.pagination import TOTAL_MODE_PATTERN, count_total, paginate
+from app.utils.serialization import render, store_response
 
-router = APIRouter(prefix="/stores", tags=["stores"])
+router = APIRouter(prefix="/stores", tags=["stores"], route_class=DatabaseRoute)
 
-@router.get("/", response_model=StoreListResponse)
-def get_stores(
-    page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100),
-    search: Optional[str] = Query(None),
-    city: Optional[str] = Query(None),
-    sector: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    query = db.query(Store)
-    
+def filter_stores(query, current_user: User, search=None, city=None, sector=None, product=None):
+    """Apply the owner scoping and list filters; returns the query and search rank."""
     if current_user.type == "store":
         query = query.filter(Store.owner_id == current_user.id)
     
+    rank = None
     if search:
-        query = query.filter(
-            or_(
-                Store.name.ilike(f"%{search}%"),
-                Store.description.ilike(f"%{search}%")
-            )
-        )
+        query, rank = search_index.search(query, Store, search)
     
     if city:
         query = query.filter(Store.city == city)
@@ -38,30 +32,63 @@ def get_stores(
     if sector:
         query = query.filter(Store.sector == sector)
     
-    total = query.count()
-    stores = query.offset((page - 1) * limit).limit(limit).all()
+    if product:
+        query = query.filter(Store.id.in_(
+            select(StoreProduct.store_id).where(StoreProduct.name == product).correlate(None)
+        ))
     
-    store_responses = []
-    for store in stores:
-        store_dict = store.__dict__.copy()
-        store_dict["products"] = store.products.split(",") if store.products else []
-        if store_dict.get("image"):
-            store_dict["image"] = f"/static/{store_dict['image']}"
-        store_responses.append(StoreResponse(**store_dict))
+    return query, rank
+
+def _store_page(db: Session, current_user: User, page, limit, search, city, sector, product, cursor, total_mode):
+    query, rank = filter_stores(db.query(Store), current_user, search, city, sector, product)
     
-    return StoreListResponse(
-        stores=store_responses,
+    total = count_total(query, total_mode)
+    stores, next_cursor = paginate(query, Store, page, limit, cursor, rank)
+    srcsets = image_srcsets(db, (store.image for store in stores))
+    
+    return StoreListResponse.model_construct(
+        stores=[store_response(store, srcsets) for store in stores],
         total=total,
         page=page,
-        limit=limit
+        limit=limit,
+        next_cursor=next_cursor
     )
 
-@router.get("/{store_id}", response_model=StoreResponse)
-def get_store(
-    store_id: str,
+@router.get("/", response_model=StoreListResponse)
+async def get_stores(
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    search: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
+    sector: Optional[str] = Query(None),
+    product: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    total_mode: str = Query("exact", pattern=TOTAL_MODE_PATTERN),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    # Only SQL in here, so with an async driver it runs on the event loop.
+    stores = await run_db(
+        db, _store_page, current_user, page, limit, search, city, sector, product, cursor or None, total_mode
+    )
+    return render(stores)
+
+@router.get("/export")
+def export_stores(
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    search: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
+    sector: Optional[str] = Query(None),
+    product: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_active_user)
+):
+    def build_query(db):
+        query, _ = filter_stores(db.query(Store), current_user, search, city, sector, product)
+        return query.order_by(Store.created_at.desc(), Store.id.desc())
+    
+    return export_response(build_query, store_response, StoreResponse, format, "stores")
+
+def _store_detail(db: Session, current_user: User, store_id: str):
     store = db.query(Store).filter(Store.id == store_id).first()
     if not store:
         raise HTTPException(status_code=404, detail="Store not found")
@@ -69,11 +96,15 @@ def get_store(
     if current_user.type == "store" and store.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    store_dict = store.__dict__.copy()
-    store_dict["products"] = store.products.split(",") if store.products else []
-    if store_dict.get("image"):
-        store_dict["image"] = f"/static/{store_dict['image']}"
-    return StoreResponse(**store_dict)
+    return store_response(store, image_srcsets(db, [store.image]))
+
+@router.get("/{store_id}", response_model=StoreResponse)
+async def get_store(
+    store_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    return render(await run_db(db, _store_detail, current_user, store_id))
 
 @router.post("/", response_model=StoreResponse)
 def create_store(
@@ -90,22 +121,19 @@ def create_store(
             )
     
     store_data = store.dict()
-    products_str = ",".join(store_data.pop("products", []))
     
     db_store = Store(
         **store_data,
-        products=products_str,
         owner_id=current_user.id
     )
     db.add(db_store)
+    db.flush()
+    adjust_counters(db, db_store.owner_id, total_stores=1, active_stores=active_delta(None, db_store.is_active))
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(db_store)
     
-    store_dict = db_store.__dict__.copy()
-    store_dict["products"] = db_store.products.split(",") if db_store.products else []
-    if store_dict.get("image"):
-        store_dict["image"] = f"/static/{store_dict['image']}"
-    return StoreResponse(**store_dict)
+    return render(store_response(db_store, image_srcsets(db, [db_store.image])))
 
 @router.put("/{store_id}", response_model=StoreResponse)
 def update_store(
@@ -122,20 +150,20 @@ def update_store(
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
     update_data = store_update.dict(exclude_unset=True)
-    if "products" in update_data:
-        update_data["products"] = ",".join(update_data["products"])
     
+    was_active = store.is_active
+    old_image = store.image
     for field, value in update_data.items():
         setattr(store, field, value)
     
+    adjust_counters(db, store.owner_id, active_stores=active_delta(was_active, store.is_active))
     db.commit()
+    invalidate_dashboard_stats()
+    if store.image != old_image:
+        release_images(db, [old_image])
     db.refresh(store)
     
-    store_dict = store.__dict__.copy()
-    store_dict["products"] = store.products.split(",") if store.products else []
-    if store_dict.get("image"):
-        store_dict["image"] = f"/static/{store_dict['image']}"
-    return StoreResponse(**store_dict)
+    return render(store_response(store, image_srcsets(db, [store.image])))
 
 @router.delete("/{store_id}")
 def delete_store(
@@ -150,6 +178,16 @@ def delete_store(
     if current_user.type == "store" and store.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
+    # Deleting a store detaches its offers (store_id is nulled), so they stay in
+    # the global totals but no longer count towards the owner.
+    offer_total, offer_active = db.query(
+        func.count(Offer.id), func.coalesce(func.sum(case((Offer.is_active == True, 1), else_=0)), 0)
+    ).filter(Offer.store_id == store.id).one()
+    adjust_counters(db, store.owner_id, total_stores=-1, active_stores=-int(store.is_active is True))
+    adjust_counters(db, store.owner_id, include_global=False, total_offers=-offer_total, active_offers=-offer_active)
+    image = store.image
     db.delete(store)
     db.commit()
+    invalidate_dashboard_stats()
+    release_images(db, [image])
     return {"message": "Store deleted successfully"}
@@ -1,69 +1,139 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from app.core.database import get_db
+from sqlalchemy import and_, or_, select, update
+from app.core.database import DatabaseRoute, get_db, run_db
 from app.core.security import get_current_active_user
+from app.utils.cache import invalidate_dashboard_stats
 from app.models import User, Subscription, Store
-from app.schemas.subscription import SubscriptionCreate, SubscriptionUpdate, SubscriptionResponse, SubscriptionListResponse
+from app.schemas.subscription import (
+    SubscriptionCreate, SubscriptionUpdate, SubscriptionResponse, SubscriptionListResponse,
+    SubscriptionBatchStatus, SubscriptionBatchStatusResponse, SkippedSubscription,
+)
+from app.utils.export import EXPORT_FORMAT_PATTERN, export_response
+from app.utils.helpers import release_images
+from app.utils.pagination import TOTAL_MODE_PATTERN, count_total, paginate
+from app.utils.serialization import render, subscription_response
 
-router = APIRouter(prefix="/subscriptions", tags=["subscriptions"])
+router = APIRouter(prefix="/subscriptions", tags=["subscriptions"], route_class=DatabaseRoute)
 
-@router.get("/", response_model=SubscriptionListResponse)
-def get_subscriptions(
-    page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100),
-    status: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    query = db.query(Subscription)
-    
+def filter_subscriptions(query, current_user: User, status: Optional[str] = None):
     if current_user.type == "store":
         query = query.filter(Subscription.user_id == current_user.id)
     
     if status:
         query = query.filter(Subscription.status == status)
     
-    total = query.count()
-    subscriptions = query.offset((page - 1) * limit).limit(limit).all()
-    
-    subscription_responses = []
-    for subscription in subscriptions:
-        subscription_dict = subscription.__dict__.copy()
-        subscription_dict["products"] = subscription.products.split(",") if subscription.products else []
-        if subscription_dict.get("image"):
-            subscription_dict["image"] = f"/static/{subscription_dict['image']}"
-        subscription_responses.append(SubscriptionResponse(**subscription_dict))
+    return query
+
+def _subscription_page(db: Session, current_user: User, page, limit, status, cursor, total_mode):
+    query = filter_subscriptions(db.query(Subscription), current_user, status)
+    total = count_total(query, total_mode)
+    subscriptions, next_cursor = paginate(query, Subscription, page, limit, cursor)
     
-    return SubscriptionListResponse(
-        subscriptions=subscription_responses,
+    return SubscriptionListResponse.model_construct(
+        subscriptions=[subscription_response(subscription) for subscription in subscriptions],
         total=total,
         page=page,
-        limit=limit
+        limit=limit,
+        next_cursor=next_cursor
     )
 
-@router.get("/check/{email}", response_model=SubscriptionResponse)
-def check_subscription_by_email(
-    email: str,
-    db: Session = Depends(get_db)
+@router.get("/", response_model=SubscriptionListResponse)
+async def get_subscriptions(
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    status: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    total_mode: str = Query("exact", pattern=TOTAL_MODE_PATTERN),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
 ):
+    subscriptions = await run_db(
+        db, _subscription_page, current_user, page, limit, status, cursor or None, total_mode
+    )
+    return render(subscriptions)
+
+@router.get("/export")
+def export_subscriptions(
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    status: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_active_user)
+):
+    def build_query(db):
+        query = filter_subscriptions(db.query(Subscription), current_user, status)
+        return query.order_by(Subscription.created_at.desc(), Subscription.id.desc())
+    
+    return export_response(build_query, subscription_response, SubscriptionResponse, format, "subscriptions")
+
+def _set_pending_status(db: Session, ids, new_status: str):
+    """Move the pending subscriptions among ``ids`` to ``new_status``; returns the changed ids.
+
+    One conditional UPDATE, so a subscription moderated concurrently is never
+    flipped twice. Dialects without UPDATE ... RETURNING lock the rows first.
+    """
+    pending = and_(Subscription.id.in_(ids), Subscription.status == "pending")
+    statement = update(Subscription).where(pending).values(status=new_status).execution_options(
+        synchronize_session=False
+    )
+    if db.get_bind().dialect.update_returning:
+        return set(db.execute(statement.returning(Subscription.id)).scalars())
+    changed = set(db.execute(select(Subscription.id).where(pending).with_for_update()).scalars())
+    db.execute(statement)
+    return changed
+
+@router.put("/batch-status", response_model=SubscriptionBatchStatusResponse)
+def batch_set_subscription_status(
+    payload: SubscriptionBatchStatus,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.type != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can approve or reject subscriptions")
+    
+    ids = list(dict.fromkeys(payload.ids))
+    updated = _set_pending_status(db, ids, payload.status)
+    
+    skipped = [subscription_id for subscription_id in ids if subscription_id not in updated]
+    current_status = {}
+    if skipped:
+        current_status = dict(db.execute(
+            select(Subscription.id, Subscription.status).where(Subscription.id.in_(skipped))
+        ).all())
+    db.commit()
+    if updated:
+        invalidate_dashboard_stats()
+    
+    return render(SubscriptionBatchStatusResponse.model_construct(
+        status=payload.status,
+        updated=[subscription_id for subscription_id in ids if subscription_id in updated],
+        skipped=[
+            SkippedSubscription.model_construct(
+                id=subscription_id,
+                reason=(
+                    f"Subscription is {current_status[subscription_id]}, not pending"
+                    if subscription_id in current_status else "Subscription not found"
+                ),
+            )
+            for subscription_id in skipped
+        ],
+    ))
+
+def _subscription_by_email(db: Session, email: str):
     subscription = db.query(Subscription).filter(Subscription.email == email).first()
     if not subscription:
         raise HTTPException(status_code=404, detail="No subscription found with this email")
     
-    subscription_dict = subscription.__dict__.copy()
-    subscription_dict["products"] = subscription.products.split(",") if subscription.products else []
-    if subscription_dict.get("image"):
-        subscription_dict["image"] = f"/static/{subscription_dict['image']}"
-    return SubscriptionResponse(**subscription_dict)
+    return subscription_response(subscription)
 
-@router.get("/{subscription_id}", response_model=SubscriptionResponse)
-def get_subscription(
-    subscription_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+@router.get("/check/{email}", response_model=SubscriptionResponse)
+async def check_subscription_by_email(
+    email: str,
+    db: Session = Depends(get_db)
 ):
+    return render(await run_db(db, _subscription_by_email, email))
+
+def _subscription_detail(db: Session, current_user: User, subscription_id: str):
     subscription = db.query(Subscription).filter(Subscription.id == subscription_id).first()
     if not subscription:
         raise HTTPException(status_code=404, detail="Subscription not found")
@@ -71,11 +141,15 @@ def get_subscription(
     if current_user.type == "store" and subscription.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    subscription_dict = subscription.__dict__.copy()
-    subscription_dict["products"] = subscription.products.split(",") if subscription.products else []
-    if subscription_dict.get("image"):
-        subscription_dict["image"] = f"/static/{subscription_dict['image']}"
-    return SubscriptionResponse(**subscription_dict)
+    return subscription_response(subscription)
+
+@router.get("/{subscription_id}", response_model=SubscriptionResponse)
+async def get_subscription(
+    subscription_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    return render(await run_db(db, _subscription_detail, current_user, subscription_id))
 
 @router.post("/", response_model=SubscriptionResponse)
 def create_subscription(
@@ -83,23 +157,18 @@ def create_subscription(
     db: Session = Depends(get_db)
 ):
     subscription_data = subscription.dict()
-    products_str = ",".join(subscription_data.pop("products", []))
     
     db_subscription = Subscription(
         **subscription_data,
-        products=products_str,
         user_id=None,
         status="pending"
     )
     db.add(db_subscription)
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(db_subscription)
     
-    subscription_dict = db_subscription.__dict__.copy()
-    subscription_dict["products"] = db_subscription.products.split(",") if db_subscription.products else []
-    if subscription_dict.get("image"):
-        subscription_dict["image"] = f"/static/{subscription_dict['image']}"
-    return SubscriptionResponse(**subscription_dict)
+    return render(subscription_response(db_subscription))
 
 @router.put("/update-by-email/{email}", response_model=SubscriptionResponse)
 def update_subscription_by_email(
@@ -115,20 +184,18 @@ def update_subscription_by_email(
         raise HTTPException(status_code=400, detail="Cannot update approved subscription")
     
     update_data = subscription_update.dict(exclude_unset=True)
-    if "products" in update_data:
-        update_data["products"] = ",".join(update_data["products"])
     
+    old_image = subscription.image
     for field, value in update_data.items():
         setattr(subscription, field, value)
     
     db.commit()
+    invalidate_dashboard_stats()
+    if subscription.image != old_image:
+        release_images(db, [old_image])
     db.refresh(subscription)
     
-    subscription_dict = subscription.__dict__.copy()
-    subscription_dict["products"] = subscription.products.split(",") if subscription.products else []
-    if subscription_dict.get("image"):
-        subscription_dict["image"] = f"/static/{subscription_dict['image']}"
-    return SubscriptionResponse(**subscription_dict)
+    return render(subscription_response(subscription))
 
 @router.put("/{subscription_id}", response_model=SubscriptionResponse)
 def update_subscription(
@@ -148,20 +215,18 @@ def update_subscription(
         raise HTTPException(status_code=400, detail="Cannot update approved subscription")
     
     update_data = subscription_update.dict(exclude_unset=True)
-    if "products" in update_data:
-        update_data["products"] = ",".join(update_data["products"])
     
+    old_image = subscription.image
     for field, value in update_data.items():
         setattr(subscription, field, value)
     
     db.commit()
+    invalidate_dashboard_stats()
+    if subscription.image != old_image:
+        release_images(db, [old_image])
     db.refresh(subscription)
     
-    subscription_dict = subscription.__dict__.copy()
-    subscription_dict["products"] = subscription.products.split(",") if subscription.products else []
-    if subscription_dict.get("image"):
-        subscription_dict["image"] = f"/static/{subscription_dict['image']}"
-    return SubscriptionResponse(**subscription_dict)
+    return render(subscription_response(subscription))
 
 @router.put("/{subscription_id}/approve", response_model=SubscriptionResponse)
 def approve_subscription(
@@ -181,13 +246,10 @@ def approve_subscription(
     
     subscription.status = "approved"
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(subscription)
     
-    subscription_dict = subscription.__dict__.copy()
-    subscription_dict["products"] = subscription.products.split(",") if subscription.products else []
-    if subscription_dict.get("image"):
-        subscription_dict["image"] = f"/static/{subscription_dict['image']}"
-    return SubscriptionResponse(**subscription_dict)
+    return render(subscription_response(subscription))
 
 @router.put("/{subscription_id}/reject", response_model=SubscriptionResponse)
 def reject_subscription(
@@ -207,13 +269,10 @@ def reject_subscription(
     
     subscription.status = "rejected"
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(subscription)
     
-    subscription_dict = subscription.__dict__.copy()
-    subscription_dict["products"] = subscription.products.split(",") if subscription.products else []
-    if subscription_dict.get("image"):
-        subscription_dict["image"] = f"/static/{subscription_dict['image']}"
-    return SubscriptionResponse(**subscription_dict)
+    return render(subscription_response(subscription))
 
 @router.delete("/{subscription_id}")
 def delete_subscription(
@@ -231,6 +290,9 @@ def delete_subscription(
     if subscription.status == "approved":
         raise HTTPException(status_code=400, detail="Cannot delete approved subscription")
     
+    image = subscription.image
     db.delete(subscription)
     db.commit()
+    invalidate_dashboard_stats()
+    release_images(db, [image])
     return {"message": "Subscription deleted successfully"}
@@ -1,32 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File
+from app.core.database import DatabaseRoute
+from app.core.images import generate_variants
 from app.core.security import get_current_active_user
+from app.core.storage import storage
 from app.models import User
 from app.schemas import FileUploadResponse
 from app.utils.helpers import save_uploaded_file
-import os
 
-router = APIRouter(prefix="/upload", tags=["upload"])
+router = APIRouter(prefix="/upload", tags=["upload"], route_class=DatabaseRoute)
 
 @router.post("/image", response_model=FileUploadResponse)
-def upload_image(
+async def upload_image(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    try:
-        filename = save_uploaded_file(file)
-        file_path = os.path.join("uploads", filename)
-        file_size = os.path.getsize(file_path)
-        
-        return FileUploadResponse(
-            filename=filename,
-            url=f"/static/{filename}",
-            size=file_size
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
+    filename, file_size = await save_uploaded_file(file)
+    background_tasks.add_task(generate_variants, filename)
+    
+    return FileUploadResponse(
+        filename=filename,
+        url=storage.url(filename),
+        size=file_size
+    )
@@ -0,0 +1,70 @@
+"""Maintenance commands: ``python -m app.cli <command>``."""
+import argparse
+import json
+import sys
+from app.core.database import SessionLocal
+
+def reconcile_counters_command(args) -> int:
+    from app.core.counters import reconcile_counters
+
+    with SessionLocal() as db:
+        drift = reconcile_counters(db, apply=not args.dry_run)
+    print(json.dumps({"drift": drift, "applied": not args.dry_run}, ensure_ascii=False, indent=2))
+    return 1 if drift and args.dry_run else 0
+
+def explain_command(args) -> int:
+    from app.core.database import engine
+    from app.core.search import search_index
+    from app.utils.query_plan import advise
+
+    # Same search backend as the running app, so ?search is explained as served.
+    search_index.install(engine)
+    with SessionLocal() as db:
+        report = advise(db)
+    flagged = [entry for entry in report if entry["sequential_scans"]]
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        for entry in report:
+            marker = "SEQ SCAN" if entry["sequential_scans"] else "ok"
+            print(f"[{marker}] {entry['endpoint']}: {entry['statement']}")
+            for line in entry["plan"]:
+                print(f"    {line}")
+        print(f"{len(flagged)} of {len(report)} statements use a sequential scan")
+    return 1 if flagged else 0
+
+def gc_uploads_command(args) -> int:
+    from app.utils.helpers import collect_orphaned_uploads
+
+    with SessionLocal() as db:
+        orphans = collect_orphaned_uploads(db, dry_run=args.dry_run)
+    print(json.dumps({"orphans": orphans, "deleted": not args.dry_run}, ensure_ascii=False, indent=2))
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = commands.add_parser(
+        "reconcile-counters", help="rebuild entity_counters from the stores/offers tables and report drift"
+    )
+    reconcile.add_argument("--dry-run", action="store_true", help="only report drift (exit 1 if any)")
+    reconcile.set_defaults(handler=reconcile_counters_command)
+
+    explain = commands.add_parser(
+        "explain", help="EXPLAIN the queries issued by the read endpoints and flag sequential scans"
+    )
+    explain.add_argument("--json", action="store_true", help="print the full report as JSON")
+    explain.set_defaults(handler=explain_command)
+
+    gc_uploads = commands.add_parser(
+        "gc-uploads", help="delete uploaded files that no store, offer or subscription references"
+    )
+    gc_uploads.add_argument("--dry-run", action="store_true", help="only list the orphaned files")
+    gc_uploads.set_defaults(handler=gc_uploads_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
-from typing import List
+import os
+from typing import List, Optional
 from pydantic import Field, AliasChoices
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,6 +11,33 @@ class Settings(BaseSettings):
         default="sqlite:///./zhwaweb.db",
         validation_alias=AliasChoices("DATABASE_URL", "database_url"),
     )
+    # Connection pool (ignored for in-memory SQLite). Pre-ping and recycling
+    # replace connections that went stale, e.g. after a database failover.
+    db_pool_size: int = Field(
+        default=5,
+        validation_alias=AliasChoices("DB_POOL_SIZE", "db_pool_size"),
+    )
+    db_max_overflow: int = Field(
+        default=10,
+        validation_alias=AliasChoices("DB_MAX_OVERFLOW", "db_max_overflow"),
+    )
+    db_pool_timeout: float = Field(
+        default=30.0,
+        validation_alias=AliasChoices("DB_POOL_TIMEOUT", "db_pool_timeout"),
+    )
+    db_pool_recycle: int = Field(
+        default=1800,
+        validation_alias=AliasChoices("DB_POOL_RECYCLE", "db_pool_recycle"),
+    )
+    db_pool_pre_ping: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("DB_POOL_PRE_PING", "db_pool_pre_ping"),
+    )
+    # Semicolon-separated PRAGMAs applied to every new SQLite connection.
+    sqlite_pragmas: str = Field(
+        default="journal_mode=WAL;synchronous=NORMAL;busy_timeout=5000;temp_store=MEMORY;cache_size=-20000",
+        validation_alias=AliasChoices("SQLITE_PRAGMAS", "sqlite_pragmas"),
+    )
     secret_key: str = Field(
         default="PRODUCTINON_SECRET_KEY",
         validation_alias=AliasChoices("SECRET_KEY", "secret_key"),
@@ -34,6 +62,190 @@ class Settings(BaseSettings):
         default=["jpg", "jpeg", "png", "gif"],
         validation_alias=AliasChoices("ALLOWED_IMAGE_TYPES", "allowed_image_types"),
     )
+    # Unreferenced uploads younger than this are kept, since a fresh upload is
+    # not attached to its store or offer yet.
+    upload_gc_grace_seconds: float = Field(
+        default=86400.0,
+        validation_alias=AliasChoices("UPLOAD_GC_GRACE_SECONDS", "upload_gc_grace_seconds"),
+    )
+    # Uploads are streamed to disk in chunks of this many bytes.
+    upload_chunk_size: int = Field(
+        default=64 * 1024,
+        validation_alias=AliasChoices("UPLOAD_CHUNK_SIZE", "upload_chunk_size"),
+    )
+
+    # Where uploads are stored: "local" (UPLOAD_DIR, served under /static) or
+    # "s3" for any S3-compatible bucket (needs boto3). S3_PUBLIC_URL is used for
+    # links when set (CDN or public bucket); otherwise links are presigned.
+    storage_backend: str = Field(
+        default="local",
+        validation_alias=AliasChoices("STORAGE_BACKEND", "storage_backend"),
+    )
+    s3_bucket: str = Field(
+        default="uploads",
+        validation_alias=AliasChoices("S3_BUCKET", "s3_bucket"),
+    )
+    s3_prefix: str = Field(
+        default="",
+        validation_alias=AliasChoices("S3_PREFIX", "s3_prefix"),
+    )
+    s3_endpoint_url: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("S3_ENDPOINT_URL", "s3_endpoint_url"),
+    )
+    s3_region: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("S3_REGION", "s3_region"),
+    )
+    s3_access_key_id: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("S3_ACCESS_KEY_ID", "s3_access_key_id"),
+    )
+    s3_secret_access_key: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("S3_SECRET_ACCESS_KEY", "s3_secret_access_key"),
+    )
+    s3_public_url: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("S3_PUBLIC_URL", "s3_public_url"),
+    )
+    s3_presign_expires_seconds: int = Field(
+        default=3600,
+        validation_alias=AliasChoices("S3_PRESIGN_EXPIRES_SECONDS", "s3_presign_expires_seconds"),
+    )
+    # Uploads larger than this go to S3 as a multipart upload in parts of this
+    # size; S3 requires at least 5 MiB per part.
+    s3_part_size: int = Field(
+        default=8 * 1024 * 1024,
+        ge=5 * 1024 * 1024,
+        validation_alias=AliasChoices("S3_PART_SIZE", "s3_part_size"),
+    )
+
+    # Password hashing: bcrypt cost for new hashes (older costs are rehashed on the
+    # next successful login) and the dedicated pool that runs it.
+    bcrypt_rounds: int = Field(
+        default=12,
+        validation_alias=AliasChoices("BCRYPT_ROUNDS", "bcrypt_rounds"),
+    )
+    password_hash_workers: int = Field(
+        default_factory=lambda: min(4, os.cpu_count() or 1),
+        validation_alias=AliasChoices("PASSWORD_HASH_WORKERS", "password_hash_workers"),
+    )
+    password_hash_queue_size: int = Field(
+        default=64,
+        validation_alias=AliasChoices("PASSWORD_HASH_QUEUE_SIZE", "password_hash_queue_size"),
+    )
+
+    # List totals: exact counts are memoized briefly per filter set and cleared
+    # by writes in the same worker (other workers' memos expire after the TTL);
+    # "estimate" totals come from planner statistics (PostgreSQL) or a
+    # longer-lived cache that writes do not clear.
+    count_cache_ttl_seconds: float = Field(
+        default=5.0,
+        validation_alias=AliasChoices("COUNT_CACHE_TTL_SECONDS", "count_cache_ttl_seconds"),
+    )
+    count_estimate_ttl_seconds: float = Field(
+        default=60.0,
+        validation_alias=AliasChoices("COUNT_ESTIMATE_TTL_SECONDS", "count_estimate_ttl_seconds"),
+    )
+
+    # Resized WebP (or AVIF/JPEG) copies of each upload, rendered on a process
+    # pool after the upload returns; needs Pillow.
+    image_variants_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("IMAGE_VARIANTS_ENABLED", "image_variants_enabled"),
+    )
+    image_variant_widths: str = Field(
+        default="160,320,640,1280",
+        validation_alias=AliasChoices("IMAGE_VARIANT_WIDTHS", "image_variant_widths"),
+    )
+    image_variant_format: str = Field(
+        default="webp",
+        validation_alias=AliasChoices("IMAGE_VARIANT_FORMAT", "image_variant_format"),
+    )
+    image_variant_quality: int = Field(
+        default=80,
+        validation_alias=AliasChoices("IMAGE_VARIANT_QUALITY", "image_variant_quality"),
+    )
+    image_workers: int = Field(
+        default_factory=lambda: min(2, os.cpu_count() or 1),
+        validation_alias=AliasChoices("IMAGE_WORKERS", "image_workers"),
+    )
+
+    # Rows fetched per round trip (and written per chunk) by the /export endpoints.
+    export_batch_size: int = Field(
+        default=1000,
+        validation_alias=AliasChoices("EXPORT_BATCH_SIZE", "export_batch_size"),
+    )
+
+    # Items written per transaction by the /offers/bulk endpoints.
+    bulk_chunk_size: int = Field(
+        default=200,
+        validation_alias=AliasChoices("BULK_CHUNK_SIZE", "bulk_chunk_size"),
+    )
+
+    # Per-route latency / SQL histograms on GET /metrics (Prometheus text
+    # format, per process) and a Server-Timing header on every response.
+    metrics_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("METRICS_ENABLED", "metrics_enabled"),
+    )
+    server_timing_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("SERVER_TIMING_ENABLED", "server_timing_enabled"),
+    )
+    # Bearer token scrapers must send to read GET /metrics; unset hides it (404).
+    metrics_token: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("METRICS_TOKEN", "metrics_token"),
+    )
+
+    # Statements slower than this are logged (0 turns the log off), the first
+    # occurrence of each slow SELECT together with its EXPLAIN plan.
+    slow_query_seconds: float = Field(
+        default=0.5,
+        validation_alias=AliasChoices("SLOW_QUERY_SECONDS", "slow_query_seconds"),
+    )
+    slow_query_explain: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("SLOW_QUERY_EXPLAIN", "slow_query_explain"),
+    )
+    # Admins may add ?profile=1 to any request to get its statements and a
+    # cProfile summary instead of the response.
+    request_profiling_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("REQUEST_PROFILING_ENABLED", "request_profiling_enabled"),
+    )
+
+    # Full-text search: auto | fts5 | postgres | memory | like
+    search_backend: str = Field(
+        default="auto",
+        validation_alias=AliasChoices("SEARCH_BACKEND", "search_backend"),
+    )
+
+    # Authenticated principals are cached per token subject so requests skip the
+    # users-table lookup. Set SHARED_CACHE_URL (redis://...) to share caches
+    # across workers.
+    principal_cache_ttl_seconds: float = Field(
+        default=60.0,
+        validation_alias=AliasChoices("PRINCIPAL_CACHE_TTL_SECONDS", "principal_cache_ttl_seconds"),
+    )
+    principal_cache_size: int = Field(
+        default=4096,
+        validation_alias=AliasChoices("PRINCIPAL_CACHE_SIZE", "principal_cache_size"),
+    )
+    token_cache_size: int = Field(
+        default=10000,
+        validation_alias=AliasChoices("TOKEN_CACHE_SIZE", "token_cache_size"),
+    )
+    dashboard_cache_ttl_seconds: float = Field(
+        default=30.0,
+        validation_alias=AliasChoices("DASHBOARD_CACHE_TTL_SECONDS", "dashboard_cache_ttl_seconds"),
+    )
+    shared_cache_url: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("SHARED_CACHE_URL", "shared_cache_url"),
+    )
 
     # Optional: allow phone-based admin login
     allow_phone_admin_login: bool = Field(
@@ -0,0 +1,141 @@
+from typing import Dict, Optional
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+from app.models import EntityCounter, Offer, Store
+
+GLOBAL_SCOPE = "global"
+COUNTER_FIELDS = ("total_stores", "active_stores", "total_offers", "active_offers")
+
+def _upsert(dialect: str, scope: str, deltas: Dict[str, int]):
+    """``INSERT ... ON CONFLICT`` adding ``deltas`` to the row of ``scope``, or None for other dialects."""
+    values = {field: deltas.get(field, 0) for field in COUNTER_FIELDS}
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(EntityCounter).values(scope=scope, **values)
+        return statement.on_conflict_do_update(
+            index_elements=[EntityCounter.scope],
+            set_={
+                **{field: getattr(EntityCounter, field) + statement.excluded[field] for field in deltas},
+                "updated_at": func.now(),
+            },
+        )
+    if dialect in ("mysql", "mariadb"):
+        statement = mysql.insert(EntityCounter).values(scope=scope, **values)
+        return statement.on_duplicate_key_update(
+            **{field: getattr(EntityCounter, field) + statement.inserted[field] for field in deltas},
+            updated_at=func.now(),
+        )
+    return None
+
+def adjust_counters(db: Session, owner_id: Optional[str], include_global: bool = True, **deltas: int) -> None:
+    """Apply ``deltas`` to the global row and ``owner_id``'s row.
+
+    Runs in the caller's transaction, so the counters commit or roll back with
+    the write they describe. Each row is upserted in one statement, so two
+    writers creating an owner's row at once both land.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    dialect = db.get_bind().dialect.name
+    scopes = ([GLOBAL_SCOPE] if include_global else []) + ([owner_id] if owner_id else [])
+    for scope in scopes:
+        statement = _upsert(dialect, scope, deltas)
+        if statement is not None:
+            db.execute(statement)
+            continue
+        updated = db.execute(
+            update(EntityCounter)
+            .where(EntityCounter.scope == scope)
+            .values({field: getattr(EntityCounter, field) + delta for field, delta in deltas.items()})
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not updated:
+            db.execute(insert(EntityCounter).values(
+                scope=scope, **{field: deltas.get(field, 0) for field in COUNTER_FIELDS}
+            ))
+
+def active_delta(before, after) -> int:
+    return int(after is True) - int(before is True)
+
+def read_counters(db: Session, owner_id: Optional[str] = None) -> Dict[str, int]:
+    scope = owner_id or GLOBAL_SCOPE
+    row = db.query(EntityCounter).filter(EntityCounter.scope == scope).first()
+    if row is None:
+        return {field: 0 for field in COUNTER_FIELDS}
+    return {field: getattr(row, field) for field in COUNTER_FIELDS}
+
+def _active(column):
+    return func.coalesce(func.sum(case((column == True, 1), else_=0)), 0)
+
+def compute_counters(db: Session) -> Dict[str, Dict[str, int]]:
+    """Recount every scope from the stores and offers tables."""
+    actual = {GLOBAL_SCOPE: dict.fromkeys(COUNTER_FIELDS, 0)}
+    
+    store_rows = db.execute(
+        select(Store.owner_id, func.count(Store.id), _active(Store.is_active)).group_by(Store.owner_id)
+    ).all()
+    for owner_id, total, active in store_rows:
+        for scope in filter(None, (GLOBAL_SCOPE, owner_id)):
+            counts = actual.setdefault(scope, dict.fromkeys(COUNTER_FIELDS, 0))
+            counts["total_stores"] += total
+            counts["active_stores"] += active
+    
+    offer_rows = db.execute(
+        select(Store.owner_id, func.count(Offer.id), _active(Offer.is_active))
+        .select_from(Offer)
+        .outerjoin(Store, Store.id == Offer.store_id)
+        .group_by(Store.owner_id)
+    ).all()
+    for owner_id, total, active in offer_rows:
+        for scope in filter(None, (GLOBAL_SCOPE, owner_id)):
+            counts = actual.setdefault(scope, dict.fromkeys(COUNTER_FIELDS, 0))
+            counts["total_offers"] += total
+            counts["active_offers"] += active
+    return actual
+
+def reconcile_counters(db: Session, apply: bool = True) -> Dict[str, Dict[str, tuple]]:
+    """Rebuild ``entity_counters`` from scratch and report drift.
+
+    Returns ``{scope: {field: (stored, actual)}}`` for every value that was off.
+    With ``apply=False`` only the report is produced.
+    """
+    actual = compute_counters(db)
+    stored = {
+        row.scope: {field: getattr(row, field) for field in COUNTER_FIELDS}
+        for row in db.query(EntityCounter).all()
+    }
+    
+    drift = {}
+    for scope in set(actual) | set(stored):
+        expected = actual.get(scope, dict.fromkeys(COUNTER_FIELDS, 0))
+        current = stored.get(scope, dict.fromkeys(COUNTER_FIELDS, 0))
+        fields = {field: (current[field], expected[field]) for field in COUNTER_FIELDS if current[field] != expected[field]}
+        if fields:
+            drift[scope] = fields
+    
+    if apply:
+        db.query(EntityCounter).delete(synchronize_session=False)
+        db.execute(insert(EntityCounter), [dict(scope=scope, **counts) for scope, counts in actual.items()])
+        db.commit()
+    return drift
+
+def ensure_counters(db: Session) -> None:
+    """Build the counters on first start, before any write has maintained them.
+
+    Every worker calls this at startup. The one whose insert of the global row
+    succeeds rebuilds the table in that same transaction; the others' inserts
+    conflict with it (waiting for it to commit where the database locks) and
+    they skip the rebuild. SQLite reports a writer still holding the lock after
+    ``busy_timeout`` as "database is locked", which is treated the same way.
+    """
+    if db.query(EntityCounter.scope).filter(EntityCounter.scope == GLOBAL_SCOPE).first() is not None:
+        return
+    try:
+        db.execute(insert(EntityCounter).values(scope=GLOBAL_SCOPE, **dict.fromkeys(COUNTER_FIELDS, 0)))
+    except (IntegrityError, OperationalError):
+        db.rollback()
+        return
+    reconcile_counters(db)
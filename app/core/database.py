@@ -1,11 +1,144 @@
-from sqlalchemy import create_engine
+import functools
+import inspect
+import threading
+import time
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core import metrics, profiling
 
-engine = create_engine(settings.database_url)
+# Async drivers and the sync driver used alongside them for schema setup,
+# scripts and streaming work.
+ASYNC_DRIVERS = {
+    "aiosqlite": "pysqlite",
+    "asyncpg": "psycopg2",
+    "aiomysql": "pymysql",
+    "asyncmy": "pymysql",
+}
+
+database_url = make_url(settings.database_url)
+is_async_database = database_url.get_driver_name() in ASYNC_DRIVERS
+
+if is_async_database:
+    sync_database_url = database_url.set(
+        drivername=f"{database_url.get_backend_name()}+{ASYNC_DRIVERS[database_url.get_driver_name()]}"
+    )
+else:
+    sync_database_url = database_url
+
+class PoolMetrics:
+    """Checkout counts and time spent waiting for a pooled connection."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+class _TimedPoolMixin:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        began = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - began, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - began)
+        return connection
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    metrics = PoolMetrics()
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+def _engine_options(url, poolclass) -> dict:
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in filter(None, (p.strip() for p in settings.sqlite_pragmas.split(";"))):
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+engine = create_engine(sync_database_url, **_engine_options(sync_database_url, TimedQueuePool))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if is_async_database:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(database_url, **_engine_options(database_url, TimedAsyncQueuePool))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autocommit=False, autoflush=False)
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
+for instrumented in filter(None, (engine, async_engine and async_engine.sync_engine)):
+    metrics.instrument_engine(instrumented)
+    profiling.instrument_engine(instrumented)
+
+if database_url.get_backend_name() == "sqlite":
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    if async_engine is not None:
+        event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+def pool_status() -> dict:
+    """Live pool occupancy and cumulative checkout stats for each engine."""
+    engines = {"sync": engine}
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+    status = {}
+    for name, current in engines.items():
+        pool = current.pool
+        if isinstance(pool, QueuePool):
+            status[name] = {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "max_overflow": settings.db_max_overflow,
+                **getattr(pool, "metrics", PoolMetrics()).snapshot(),
+            }
+        else:
+            status[name] = {"pool": type(pool).__name__, "status": pool.status()}
+    return status
+
 Base = declarative_base()
 
 def get_db():
@@ -14,3 +147,58 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def run_db(db, fn, *args):
+    """Call ``fn(session, *args)`` without blocking the event loop.
+
+    ``db`` is whatever ``get_db`` resolved to for the request: a sync ``Session``
+    (run in the threadpool) or, with an async driver, an ``AsyncSession``.
+    """
+    if is_async_database:
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
+
+def with_async_session(call):
+    """Adapt an async endpoint or dependency that takes ``db = Depends(get_db)``.
+
+    With an async driver configured the ``db`` of async callables resolves to an
+    ``AsyncSession``, which they reach through :func:`run_db`. Sync callables are
+    left alone: FastAPI runs them in the threadpool with a sync ``Session``, so
+    blocking work they do besides SQL (file and storage calls) never runs on
+    the event loop.
+    """
+    signature = inspect.signature(call)
+    db_param = signature.parameters.get("db")
+    if (
+        not is_async_database
+        or not inspect.iscoroutinefunction(call)
+        or db_param is None
+        or getattr(db_param.default, "dependency", None) is not get_db
+    ):
+        return call
+
+    parameters = [
+        param.replace(default=Depends(get_async_db)) if param.name == "db" else param
+        for param in signature.parameters.values()
+    ]
+
+    @functools.wraps(call)
+    async def wrapper(**kwargs):
+        return await call(**kwargs)
+
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    return wrapper
+
+class DatabaseRoute(APIRoute):
+    """Route class for routers whose endpoints depend on ``get_db``.
+
+    Endpoints are also wrapped for the ``?profile=1`` profiler, see
+    :mod:`app.core.profiling`.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, with_async_session(profiling.profiled(endpoint)), **kwargs)
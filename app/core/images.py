@@ -0,0 +1,131 @@
+import asyncio
+import importlib.util
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, insert
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.storage import LocalStorage, storage
+from app.models import ImageVariant
+from app.utils.cache import invalidate_dashboard_stats
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def variant_widths() -> List[int]:
+    return sorted({int(width) for width in settings.image_variant_widths.split(",") if width.strip()})
+
+def render_variants(source_path: str, widths: List[int], fmt: str, quality: int) -> List[Tuple[int, str]]:
+    """Write resized ``fmt`` copies of ``source_path`` next to it; runs in a worker process.
+
+    Images are never upscaled: widths above the original collapse into one
+    variant at the original width. Orientation from EXIF is applied to the
+    pixels and the metadata itself is not carried over.
+    """
+    from PIL import Image, ImageOps
+
+    directory, name = os.path.split(source_path)
+    stem = os.path.splitext(name)[0]
+    written = []
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+        for width in sorted({min(width, image.width) for width in widths}):
+            height = max(1, round(image.height * width / image.width))
+            variant = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            filename = f"{stem}_{width}.{fmt}"
+            temp_path = os.path.join(directory, f".{filename}.part")
+            variant.save(temp_path, format=fmt.upper(), quality=quality)
+            os.replace(temp_path, os.path.join(directory, filename))
+            written.append((width, filename))
+    return written
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.image_workers)
+        return _pool
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def has_variants(source: str) -> bool:
+    with SessionLocal() as db:
+        return db.query(ImageVariant.source).filter(ImageVariant.source == source).first() is not None
+
+def record_variants(source: str, variants: List[Tuple[int, str]]) -> None:
+    with SessionLocal() as db:
+        db.execute(delete(ImageVariant).where(ImageVariant.source == source))
+        if variants:
+            db.execute(insert(ImageVariant), [
+                {"source": source, "width": width, "filename": filename} for width, filename in variants
+            ])
+        db.commit()
+    # Cached dashboard payloads carry srcsets too.
+    invalidate_dashboard_stats()
+
+async def generate_variants(filename: str, upload_dir: str = None) -> None:
+    """Background task: render the configured variants of an upload and record them.
+
+    Local uploads are rendered in place. With a remote backend the original is
+    downloaded to a scratch directory and the variants are uploaded from there.
+    """
+    if not settings.image_variants_enabled or importlib.util.find_spec("PIL") is None:
+        return
+    # Uploads are content-addressed, so a repeated upload already has its variants.
+    if await run_in_threadpool(has_variants, filename):
+        return
+    backend = LocalStorage(upload_dir) if upload_dir is not None else storage
+    scratch = None if isinstance(backend, LocalStorage) else await run_in_threadpool(tempfile.mkdtemp)
+    loop = asyncio.get_running_loop()
+    try:
+        if scratch is None:
+            source_path = backend.path(filename)
+        else:
+            source_path = os.path.join(scratch, filename)
+            await run_in_threadpool(backend.download, filename, source_path)
+        variants = await loop.run_in_executor(
+            _executor(),
+            render_variants,
+            source_path,
+            variant_widths(),
+            settings.image_variant_format,
+            settings.image_variant_quality,
+        )
+        if scratch is not None:
+            for _, variant in variants:
+                await run_in_threadpool(backend.put_file, variant, os.path.join(scratch, variant))
+    except Exception:
+        logger.exception("Could not generate image variants for %s", filename)
+        return
+    finally:
+        if scratch is not None:
+            await run_in_threadpool(shutil.rmtree, scratch, True)
+    await run_in_threadpool(record_variants, filename, variants)
+
+def image_srcsets(db, filenames: Iterable[Optional[str]]) -> Dict[str, str]:
+    """``srcset`` strings for the given uploads, in one query; images without variants are absent."""
+    sources = {filename for filename in filenames if filename}
+    if not sources:
+        return {}
+    rows = db.query(ImageVariant.source, ImageVariant.width, ImageVariant.filename).filter(
+        ImageVariant.source.in_(sources)
+    ).order_by(ImageVariant.source, ImageVariant.width)
+    srcsets: Dict[str, List[str]] = {}
+    for source, width, variant in rows:
+        srcsets.setdefault(source, []).append(f"{storage.url(variant)} {width}w")
+    return {source: ", ".join(entries) for source, entries in srcsets.items()}
@@ -0,0 +1,195 @@
+"""Per-request latency and SQL statistics, exposed in the Prometheus text format.
+
+The middleware opens a :class:`RequestStats` for each HTTP request in a context
+variable; the engine hooks add every statement executed while it is current,
+including statements run from the threadpool or through ``AsyncSession``
+(both inherit the request's context). Histograms are kept per process.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+from sqlalchemy import event
+from app.core.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+UNMATCHED_ROUTE = "<unmatched>"
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a fixed tuple of label values."""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # Bucket counts (the last one is +Inf), then the sum of values.
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        for label_values, values in series:
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values))
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {values[-1]}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Wall time from receiving the request to the end of the response body.",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL statements per request.",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+REQUEST_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "SQL statements executed per request.",
+    ("method", "route", "status"),
+    STATEMENT_BUCKETS,
+)
+STATEMENT_SECONDS = Histogram(
+    "db_statement_duration_seconds",
+    "Execution time of single SQL statements, inside and outside requests.",
+    (),
+    LATENCY_BUCKETS,
+)
+HISTOGRAMS = (REQUEST_SECONDS, REQUEST_DB_SECONDS, REQUEST_STATEMENTS, STATEMENT_SECONDS)
+
+class RequestStats:
+    """SQL work attributed to one request."""
+
+    __slots__ = ("statements", "db_seconds", "scope")
+
+    def __init__(self, scope=None):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.scope = scope
+
+    def add(self, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._started_at = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "_started_at", None)
+    if started_at is None:
+        return
+    elapsed = time.perf_counter() - started_at
+    STATEMENT_SECONDS.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.add(elapsed)
+
+def instrument_engine(engine) -> None:
+    """Time every statement ``engine`` runs (pass ``AsyncEngine.sync_engine`` for async engines)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def route_template(app, scope) -> str:
+    """Path template of the route that handled ``scope``, e.g. ``/stores/{store_id}``.
+
+    Routing stores the matched endpoint in the scope; it is mapped back to its
+    route here so label values stay bounded however many ids are requested.
+    """
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    templates = getattr(app.state, "route_templates", None)
+    if templates is None or endpoint not in templates:
+        templates = {}
+        for route in app.router.routes:
+            target = getattr(route, "endpoint", None) or getattr(route, "app", None)
+            templates.setdefault(target, route.path)
+        app.state.route_templates = templates
+    return templates.get(endpoint, UNMATCHED_ROUTE)
+
+def server_timing(total_seconds: float, stats: RequestStats) -> str:
+    return (
+        f"app;dur={total_seconds * 1000:.1f}, "
+        f'db;desc="{stats.statements} statements";dur={stats.db_seconds * 1000:.1f}'
+    )
+
+class RequestMetrics:
+    """ASGI middleware recording latency, DB time and statement count per request.
+
+    ``Server-Timing`` reflects the work done before the response headers were
+    sent; the histograms are updated once the body is complete, so streamed
+    responses (exports) are counted in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        started_at = time.perf_counter()
+        status = 500
+
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.server_timing_enabled:
+                    headers = list(message.get("headers", []))
+                    value = server_timing(time.perf_counter() - started_at, stats)
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _current.reset(token)
+            labels = (scope["method"], route_template(scope["app"], scope), str(status))
+            REQUEST_SECONDS.observe(time.perf_counter() - started_at, *labels)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, *labels)
+            REQUEST_STATEMENTS.observe(stats.statements, *labels)
+
+def render_metrics() -> str:
+    return "\n".join(histogram.render() for histogram in HISTOGRAMS) + "\n"
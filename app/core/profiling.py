@@ -0,0 +1,274 @@
+"""Slow-query log and the admin-only ``?profile=1`` request profiler.
+
+Both build on the statement timing in :mod:`app.core.metrics`: its
+``before_cursor_execute`` hook stamps each statement's start time, and the hook
+here runs after the one there on the same engines.
+"""
+import cProfile
+import functools
+import inspect
+import io
+import json
+import logging
+import pstats
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, List, Optional
+from urllib.parse import parse_qs
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.metrics import current_stats, route_template
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger("app.slow_query")
+
+# Statements already explained; each distinct slow statement is explained once.
+_explained = TTLCache(maxsize=1024, ttl=86400.0)
+_explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+BUSY_NOTE = "not profiled: other requests were in flight, and profiling the event loop would include their work"
+OVERLAP_NOTE = "other requests started meanwhile; the profile includes their work on the event loop"
+
+class RequestProfile:
+    """Statements and the cProfile of one ``?profile=1`` request."""
+
+    def __init__(self):
+        self.statements: List[dict] = []
+        self.profiler = cProfile.Profile()
+        self.profiled = False
+        self.note: Optional[str] = None
+
+_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+# Set while the explainer runs, so its EXPLAIN statements are not logged themselves.
+_explaining: ContextVar[bool] = ContextVar("explaining_slow_query", default=False)
+# HTTP requests in progress in this worker and the profiles running on the event
+# loop; both only change on the event loop thread.
+_in_flight = 0
+_loop_profiles = set()
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Types of the bound parameters, without their values."""
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameter_shape(parameters[0]) if parameters else None
+        return {"rows": len(parameters), "row": first}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+def _request_label() -> str:
+    stats = current_stats()
+    if stats is None or stats.scope is None:
+        return "-"
+    return f"{stats.scope['method']} {route_template(stats.scope['app'], stats.scope)}"
+
+def compile_for(dialect, clause):
+    """SQL text and parameters of ``clause`` in ``dialect``'s placeholder style."""
+    compiled = clause.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    parameters = compiled.params
+    if compiled.positional:
+        parameters = tuple(parameters[name] for name in compiled.positiontup)
+    return compiled.string, parameters
+
+def _explain_and_log(statement: str, parameters, request: str, clause=None) -> None:
+    from app.core.database import engine
+    from app.utils.query_plan import explain
+
+    _explaining.set(True)
+    try:
+        with engine.connect() as connection:
+            if clause is not None:
+                plan = explain(connection, *compile_for(connection.dialect, clause))
+            else:
+                plan = explain(connection, statement, parameters)
+    except Exception as exc:
+        logger.warning("Could not explain slow query from %s: %s", request, exc)
+        return
+    logger.warning("Plan of slow query from %s:\n%s\n%s", request, statement, "\n".join(plan))
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "_started_at", None)
+    if started_at is None:
+        return
+    elapsed = time.perf_counter() - started_at
+
+    profile = _profile.get()
+    if profile is not None:
+        profile.statements.append({
+            "statement": statement,
+            "parameters": parameter_shape(parameters, executemany),
+            "duration_ms": round(elapsed * 1000, 3),
+        })
+
+    if 0 < settings.slow_query_seconds <= elapsed and not _explaining.get():
+        request = _request_label()
+        logger.warning(
+            "Slow query (%.1f ms) from %s: %s parameters=%s",
+            elapsed * 1000, request, statement, parameter_shape(parameters, executemany),
+        )
+        if (
+            settings.slow_query_explain
+            and not executemany
+            and statement.lstrip().upper().startswith(("SELECT", "WITH"))
+            and _explained.get(statement) is None
+        ):
+            from app.core.database import engine
+
+            # The explainer runs on the sync engine. Statements from the async
+            # engine are recompiled for its dialect (asyncpg's ``$1`` placeholders
+            # mean nothing to psycopg2); raw SQL from there cannot be, so is skipped.
+            clause = None
+            if conn.engine is not engine:
+                compiled = getattr(context, "compiled", None)
+                clause = compiled.statement if compiled is not None else None
+            if conn.engine is engine or clause is not None:
+                _explained.set(statement, True)
+                # Explained on a connection of its own, after this statement is done.
+                _explainer.submit(_explain_and_log, statement, parameters, request, clause)
+
+def instrument_engine(engine) -> None:
+    """Slow-query logging and profiling for ``engine``; call after ``metrics.instrument_engine``."""
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def profiled(call):
+    """Run an endpoint under the request's profiler when ``?profile=1`` is active.
+
+    Sync endpoints are profiled in the worker thread that runs them; async ones
+    on the event loop between their awaits. The event loop also runs every other
+    request, so async endpoints are only profiled while no other request is in
+    flight, and the output notes it when one starts meanwhile.
+    """
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def wrapper(*args, **kwargs):
+            profile = _profile.get()
+            if profile is None:
+                return await call(*args, **kwargs)
+            if _in_flight > 1:
+                profile.note = BUSY_NOTE
+                return await call(*args, **kwargs)
+            if not _enable(profile):
+                return await call(*args, **kwargs)
+            _loop_profiles.add(profile)
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                profile.profiler.disable()
+                _loop_profiles.discard(profile)
+    else:
+        @functools.wraps(call)
+        def wrapper(*args, **kwargs):
+            profile = _profile.get()
+            if profile is None or not _enable(profile):
+                return call(*args, **kwargs)
+            try:
+                return call(*args, **kwargs)
+            finally:
+                profile.profiler.disable()
+    return wrapper
+
+def _enable(profile: RequestProfile) -> bool:
+    try:
+        profile.profiler.enable()
+    except ValueError:  # another profiler is already active on this thread
+        return False
+    profile.profiled = True
+    return True
+
+def profile_summary(profile: RequestProfile, limit: int = 40) -> str:
+    if not profile.profiled:
+        return ""
+    stream = io.StringIO()
+    pstats.Stats(profile.profiler, stream=stream).strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+def _is_admin(authorization: Optional[str]) -> bool:
+    from app.core.database import SessionLocal
+    from app.core.security import get_principal, verify_token
+
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        token_data = verify_token(token, HTTPException(status_code=401))
+    except HTTPException:
+        return False
+    with SessionLocal() as db:
+        user = get_principal(db, token_data.username)
+    return user is not None and user.is_active and user.type == "admin"
+
+class QueryProfiler:
+    """ASGI middleware answering ``?profile=1`` requests from admins with a profile.
+
+    The request runs as usual, but instead of its response the client receives
+    JSON with the original status, every SQL statement with its parameter
+    types and duration, and a cProfile summary of the endpoint. The query
+    parameter is ignored for anyone but an active admin.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight
+        if scope["type"] != "http" or not settings.request_profiling_enabled:
+            return await self.app(scope, receive, send)
+        _in_flight += 1
+        for profile in _loop_profiles:
+            profile.note = OVERLAP_NOTE
+        try:
+            await self._handle(scope, receive, send)
+        finally:
+            _in_flight -= 1
+
+    async def _handle(self, scope, receive, send):
+        if b"profile=" not in scope.get("query_string", b""):
+            return await self.app(scope, receive, send)
+        query = parse_qs(scope["query_string"].decode("latin-1"))
+        if query.get("profile", [""])[-1] not in ("1", "true"):
+            return await self.app(scope, receive, send)
+
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+        if not await run_in_threadpool(_is_admin, authorization):
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile()
+        token = _profile.set(profile)
+        response = {"status": 500, "bytes": 0}
+        started_at = time.perf_counter()
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            _profile.reset(token)
+        elapsed = time.perf_counter() - started_at
+
+        body = json.dumps({
+            "method": scope["method"],
+            "route": route_template(scope["app"], scope),
+            "response_status": response["status"],
+            "response_bytes": response["bytes"],
+            "duration_ms": round(elapsed * 1000, 3),
+            "db_ms": round(sum(item["duration_ms"] for item in profile.statements), 3),
+            "statement_count": len(profile.statements),
+            "statements": profile.statements,
+            "profile": profile_summary(profile),
+            "profile_note": profile.note,
+        }, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
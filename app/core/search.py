@@ -0,0 +1,374 @@
+import hashlib
+import logging
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from sqlalchemy import Float, String, column, event, false, inspect, literal, or_, select, table, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, object_session
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+")
+_ARABIC_MARKS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+_ARABIC_LETTERS = str.maketrans({
+    "آ": "ا",  # alef with madda
+    "أ": "ا",  # alef with hamza above
+    "إ": "ا",  # alef with hamza below
+    "ٱ": "ا",  # alef wasla
+    "ى": "ي",  # alef maqsura -> yeh
+    "ة": "ه",  # teh marbuta -> heh
+    "ؤ": "و",  # waw with hamza
+    "ئ": "ي",  # yeh with hamza
+})
+# Definite-article prefixes (with the common و/ب/ك/ف/ل clitics) are dropped so
+# that "المطعم", "والمطعم" and "مطعم" index to the same term.
+_ARTICLE_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+# Index changes of the memory backend waiting in ``Session.info`` for the commit.
+_PENDING = "search_index_pending"
+
+_memory_hits = table(
+    "search_memory_hits", column("search", String), column("doc_id", String), column("rank", Float)
+)
+
+def normalize(value: str) -> str:
+    value = unicodedata.normalize("NFKC", value or "").lower()
+    return _ARABIC_MARKS.sub("", value).translate(_ARABIC_LETTERS)
+
+def tokenize(value: str):
+    tokens = []
+    for token in _TOKEN.findall(normalize(value)):
+        for prefix in _ARTICLE_PREFIXES:
+            if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+                token = token[len(prefix):]
+                break
+        tokens.append(token)
+    return tokens
+
+def _empty_hits():
+    return select(
+        literal(None, String).label("doc_id"), literal(0.0, Float).label("rank")
+    ).where(false()).subquery("search_hits")
+
+class LikeBackend:
+    """Legacy substring matching with ILIKE; keeps no index of its own."""
+
+    name = "like"
+    # Writes go through the flushing connection and commit or roll back with it.
+    transactional = True
+
+    def install(self, engine, documents):
+        pass
+
+    def index(self, connection, kind, doc_id, body):
+        pass
+
+    def remove(self, connection, kind, doc_id):
+        pass
+
+    def hits(self, connection, kind, tokens):
+        return None
+
+class SQLiteFTSBackend(LikeBackend):
+    """FTS5 virtual table per document kind, keyed through ``search_docids``."""
+
+    name = "fts5"
+
+    @staticmethod
+    def available(engine) -> bool:
+        try:
+            with engine.connect() as connection:
+                connection.exec_driver_sql("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(body)")
+                connection.exec_driver_sql("DROP TABLE temp.fts5_probe")
+            return True
+        except OperationalError:
+            return False
+
+    def install(self, engine, documents):
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                "CREATE TABLE IF NOT EXISTS search_docids ("
+                "id INTEGER PRIMARY KEY, kind VARCHAR(32) NOT NULL, doc_id VARCHAR(36) NOT NULL, "
+                "UNIQUE (kind, doc_id))"
+            )
+            for kind, (model, fields) in documents.items():
+                exists = connection.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE name = ?", (f"search_fts_{kind}",)
+                ).first()
+                if exists:
+                    continue
+                connection.exec_driver_sql(
+                    f"CREATE VIRTUAL TABLE search_fts_{kind} USING fts5("
+                    "body, tokenize = 'unicode61 remove_diacritics 2')"
+                )
+                for row in connection.execute(select(model.id, *(getattr(model, f) for f in fields))):
+                    self.index(connection, kind, row[0], " ".join(v or "" for v in row[1:]))
+
+    def index(self, connection, kind, doc_id, body):
+        connection.execute(
+            text("INSERT INTO search_docids (kind, doc_id) VALUES (:kind, :doc_id) "
+                 "ON CONFLICT (kind, doc_id) DO NOTHING"),
+            {"kind": kind, "doc_id": doc_id},
+        )
+        connection.execute(
+            text(f"INSERT OR REPLACE INTO search_fts_{kind} (rowid, body) "
+                 "SELECT id, :body FROM search_docids WHERE kind = :kind AND doc_id = :doc_id"),
+            {"kind": kind, "doc_id": doc_id, "body": " ".join(tokenize(body))},
+        )
+
+    def remove(self, connection, kind, doc_id):
+        params = {"kind": kind, "doc_id": doc_id}
+        connection.execute(
+            text(f"DELETE FROM search_fts_{kind} WHERE rowid = "
+                 "(SELECT id FROM search_docids WHERE kind = :kind AND doc_id = :doc_id)"),
+            params,
+        )
+        connection.execute(text("DELETE FROM search_docids WHERE kind = :kind AND doc_id = :doc_id"), params)
+
+    def hits(self, connection, kind, tokens):
+        match = " ".join(f'"{token}"*' for token in tokens)
+        return text(
+            f"SELECT d.doc_id AS doc_id, -bm25(search_fts_{kind}) AS rank "
+            f"FROM search_fts_{kind} JOIN search_docids d ON d.id = search_fts_{kind}.rowid "
+            f"WHERE search_fts_{kind} MATCH :match"
+        ).bindparams(match=match).columns(doc_id=String, rank=Float).subquery("search_hits")
+
+class PostgresFTSBackend(LikeBackend):
+    """``tsvector`` documents in one side table with a GIN index."""
+
+    name = "postgres"
+
+    def install(self, engine, documents):
+        with engine.begin() as connection:
+            created = connection.exec_driver_sql("SELECT to_regclass('search_documents')").scalar() is None
+            connection.exec_driver_sql(
+                "CREATE TABLE IF NOT EXISTS search_documents ("
+                "kind VARCHAR(32) NOT NULL, doc_id VARCHAR(36) NOT NULL, document TSVECTOR NOT NULL, "
+                "PRIMARY KEY (kind, doc_id))"
+            )
+            connection.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_search_documents_document "
+                "ON search_documents USING GIN (document)"
+            )
+            if not created:
+                return
+            for kind, (model, fields) in documents.items():
+                for row in connection.execute(select(model.id, *(getattr(model, f) for f in fields))):
+                    self.index(connection, kind, row[0], " ".join(v or "" for v in row[1:]))
+
+    def index(self, connection, kind, doc_id, body):
+        connection.execute(
+            text("INSERT INTO search_documents (kind, doc_id, document) "
+                 "VALUES (:kind, :doc_id, to_tsvector('simple', :body)) "
+                 "ON CONFLICT (kind, doc_id) DO UPDATE SET document = EXCLUDED.document"),
+            {"kind": kind, "doc_id": doc_id, "body": " ".join(tokenize(body))},
+        )
+
+    def remove(self, connection, kind, doc_id):
+        connection.execute(
+            text("DELETE FROM search_documents WHERE kind = :kind AND doc_id = :doc_id"),
+            {"kind": kind, "doc_id": doc_id},
+        )
+
+    def hits(self, connection, kind, tokens):
+        return text(
+            "SELECT doc_id, ts_rank(document, query) AS rank "
+            "FROM search_documents, to_tsquery('simple', :match) AS query "
+            "WHERE kind = :kind AND document @@ query"
+        ).bindparams(
+            kind=kind, match=" & ".join(f"{token}:*" for token in tokens)
+        ).columns(doc_id=String, rank=Float).subquery("search_hits")
+
+class MemoryBackend(LikeBackend):
+    """In-process inverted index, for databases without full-text support.
+
+    Each worker process keeps its own index, built at startup and updated by
+    that worker's writes only, so it suits single-worker deployments. Writes are
+    applied once their session commits. Matches are loaded into a temporary
+    table on the searching connection and joined from there.
+    """
+
+    name = "memory"
+    transactional = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(lambda: defaultdict(dict))
+        self._documents = defaultdict(dict)
+        self._terms = {}
+
+    def install(self, engine, documents):
+        with engine.connect() as connection:
+            for kind, (model, fields) in documents.items():
+                for row in connection.execute(select(model.id, *(getattr(model, f) for f in fields))):
+                    self.index(connection, kind, row[0], " ".join(v or "" for v in row[1:]))
+
+    def index(self, connection, kind, doc_id, body):
+        with self._lock:
+            self._remove(kind, doc_id)
+            tokens = tokenize(body)
+            postings = self._postings[kind]
+            for token in tokens:
+                postings[token][doc_id] = postings[token].get(doc_id, 0) + 1
+            self._documents[kind][doc_id] = set(tokens)
+            self._terms.pop(kind, None)
+
+    def remove(self, connection, kind, doc_id):
+        with self._lock:
+            self._remove(kind, doc_id)
+
+    def _remove(self, kind, doc_id):
+        postings = self._postings[kind]
+        for token in self._documents[kind].pop(doc_id, ()):
+            postings[token].pop(doc_id, None)
+            if not postings[token]:
+                del postings[token]
+        self._terms.pop(kind, None)
+
+    def _scores(self, kind, tokens):
+        postings = self._postings[kind]
+        terms = self._terms.get(kind)
+        if terms is None:
+            terms = self._terms[kind] = sorted(postings)
+        total = max(len(self._documents[kind]), 1)
+        scores = None
+        for token in tokens:
+            matched = defaultdict(float)
+            position = bisect_left(terms, token)
+            while position < len(terms) and terms[position].startswith(token):
+                docs = postings[terms[position]]
+                idf = math.log(1 + total / len(docs))
+                for doc_id, frequency in docs.items():
+                    matched[doc_id] += frequency * idf
+                position += 1
+            if scores is None:
+                scores = matched
+            else:
+                scores = {doc_id: score + matched[doc_id] for doc_id, score in scores.items() if doc_id in matched}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def hits(self, connection, kind, tokens):
+        with self._lock:
+            scores = self._scores(kind, tokens)
+        if not scores:
+            return _empty_hits()
+        search = hashlib.sha1(f"{kind}:{' '.join(tokens)}".encode("utf-8")).hexdigest()
+        connection.exec_driver_sql(
+            "CREATE TEMPORARY TABLE IF NOT EXISTS search_memory_hits ("
+            "search VARCHAR(40) NOT NULL, doc_id VARCHAR(36) NOT NULL, rank FLOAT NOT NULL, "
+            "PRIMARY KEY (search, doc_id))"
+        )
+        connection.execute(text("DELETE FROM search_memory_hits WHERE search = :search"), {"search": search})
+        connection.execute(
+            text("INSERT INTO search_memory_hits (search, doc_id, rank) VALUES (:search, :doc_id, :rank)"),
+            [{"search": search, "doc_id": doc_id, "rank": rank} for doc_id, rank in scores.items()],
+        )
+        return select(_memory_hits.c.doc_id, _memory_hits.c.rank).where(
+            _memory_hits.c.search == search
+        ).subquery("search_hits")
+
+class SearchIndex:
+    """Full-text index over registered model fields.
+
+    Models register the fields to index; ORM insert/update/delete events keep
+    the active backend in sync inside the flushing transaction, or, for the
+    memory backend, once the session commits. Until :meth:`install` runs,
+    searches fall back to ILIKE.
+    """
+
+    def __init__(self):
+        self.documents = {}
+        self.backend = LikeBackend()
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+
+    def register(self, model, *fields):
+        self.documents[model.__tablename__] = (model, fields)
+        event.listen(model, "after_insert", self._after_insert)
+        event.listen(model, "after_update", self._after_update)
+        event.listen(model, "after_delete", self._after_delete)
+
+    def install(self, engine):
+        choice = settings.search_backend
+        if choice == "auto":
+            if engine.dialect.name == "postgresql":
+                choice = "postgres"
+            elif engine.dialect.name == "sqlite" and SQLiteFTSBackend.available(engine):
+                choice = "fts5"
+            else:
+                choice = "memory"
+        backend = {
+            "like": LikeBackend,
+            "fts5": SQLiteFTSBackend,
+            "postgres": PostgresFTSBackend,
+            "memory": MemoryBackend,
+        }[choice]()
+        backend.install(engine, self.documents)
+        self.backend = backend
+        logger.info("Search backend: %s", backend.name)
+
+    def _write(self, session, connection, method, *args):
+        if self.backend.transactional or session is None:
+            getattr(self.backend, method)(connection, *args)
+        else:
+            session.info.setdefault(_PENDING, []).append((method, args))
+
+    def index_document(self, connection, target):
+        kind = target.__tablename__
+        _, fields = self.documents[kind]
+        body = " ".join(getattr(target, field) or "" for field in fields)
+        self._write(object_session(target), connection, "index", kind, target.id, body)
+
+    def index_mappings(self, db, model, mappings):
+        """Index rows written by bulk statements, which skip the ORM events."""
+        kind = model.__tablename__
+        _, fields = self.documents[kind]
+        connection = db.connection()
+        for values in mappings:
+            body = " ".join(values.get(field) or "" for field in fields)
+            self._write(db, connection, "index", kind, values["id"], body)
+
+    def remove_ids(self, db, model, ids):
+        connection = db.connection()
+        for doc_id in ids:
+            self._write(db, connection, "remove", model.__tablename__, doc_id)
+
+    def _after_insert(self, mapper, connection, target):
+        self.index_document(connection, target)
+
+    def _after_update(self, mapper, connection, target):
+        _, fields = self.documents[target.__tablename__]
+        state = inspect(target)
+        if any(state.attrs[field].history.has_changes() for field in fields):
+            self.index_document(connection, target)
+
+    def _after_delete(self, mapper, connection, target):
+        self._write(object_session(target), connection, "remove", target.__tablename__, target.id)
+
+    def _after_commit(self, session):
+        for method, args in session.info.pop(_PENDING, ()):
+            getattr(self.backend, method)(None, *args)
+
+    def _after_rollback(self, session):
+        session.info.pop(_PENDING, None)
+
+    def search(self, query, model, term: str):
+        """Restrict ``query`` to rows of ``model`` matching ``term``.
+
+        Returns the filtered query and a relevance column to order by (higher is
+        better), or ``None`` when the ILIKE fallback is in use.
+        """
+        tokens = tokenize(term)
+        hits = self.backend.hits(query.session.connection(), model.__tablename__, tokens) if tokens else None
+        if hits is None:
+            _, fields = self.documents[model.__tablename__]
+            return query.filter(or_(*(getattr(model, field).ilike(f"%{term}%") for field in fields))), None
+        return query.join(hits, hits.c.doc_id == model.id), hits.c.rank
+
+search_index = SearchIndex()
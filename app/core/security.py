@@ -1,18 +1,41 @@
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, run_db
 from app.models import User
 from app.schemas.user import TokenData
+from app.utils.cache import TTLCache, build_cache, run_cache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
 security = HTTPBearer()
 
+PRINCIPAL_FIELDS = ("id", "username", "type", "is_active")
+# Usernames whose cached principal is evicted when the session commits.
+EVICTED_PRINCIPALS = "evicted_principals"
+principal_cache = build_cache(
+    "principal",
+    maxsize=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl_seconds,
+    shared=True,
+)
+# Verified token subjects keyed by SHA-256 of the token, so a token reused for its
+# whole lifetime pays for signature verification once per worker.
+token_cache = TTLCache(
+    maxsize=settings.token_cache_size,
+    ttl=settings.access_token_expire_minutes * 60,
+)
+
 def _truncate_to_bcrypt_limit(secret: str) -> str:
     """bcrypt accepts at most 72 bytes. Truncate safely on byte boundary."""
     secret_bytes = secret.encode("utf-8")
@@ -27,6 +50,58 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(_truncate_to_bcrypt_limit(password))
 
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL, so a few threads give real parallelism while keeping
+    slow hashes off the event loop and out of the request threadpool. Once
+    ``max_pending`` calls are queued or running, new ones are refused with 503.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication is busy, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+        try:
+            return await asyncio.wrap_future(self._executor.submit(fn, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "rejected": self.rejected,
+                "completed": self.completed,
+            }
+
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_queue_size)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -38,6 +113,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def verify_token(token: str, credentials_exception):
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    username = token_cache.get(digest)
+    if username is not None:
+        return TokenData(username=username)
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         username: str = payload.get("sub")
@@ -46,29 +125,121 @@ def verify_token(token: str, credentials_exception):
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
+    expires_at = payload.get("exp")
+    token_cache.set(digest, username, ttl=expires_at - time.time() if expires_at else None)
     return token_data
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     token_data = verify_token(credentials.credentials, credentials_exception)
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = await get_principal_async(db, token_data.username)
     if user is None:
         raise credentials_exception
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+def _principal_snapshot(db: Session, username: str) -> Optional[dict]:
+    user = db.query(User).filter(User.username == username).first()
+    if user is None:
+        return None
+    return {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+
+def get_principal(db: Session, username: str) -> Optional[User]:
+    """Return a detached ``User`` carrying the fields authorization relies on.
+
+    Served from ``principal_cache`` when possible; the users table is only read
+    on a miss.
+    """
+    snapshot = principal_cache.get(username)
+    if snapshot is None:
+        snapshot = _principal_snapshot(db, username)
+        if snapshot is None:
+            return None
+        principal_cache.set(username, snapshot)
+    return User(**snapshot)
+
+async def get_principal_async(db: Session, username: str) -> Optional[User]:
+    """Like ``get_principal``, for async callers; ``db`` may be an ``AsyncSession``."""
+    snapshot = await run_cache(principal_cache.get, username)
+    if snapshot is None:
+        snapshot = await run_db(db, _principal_snapshot, username)
+        if snapshot is None:
+            return None
+        await run_cache(principal_cache.set, username, snapshot)
+    return User(**snapshot)
+
+def _queue_eviction(target, usernames):
+    """Evict ``usernames`` once the session holding ``target`` commits.
+
+    Evicting at flush time would let a concurrent request re-cache the old row
+    before the commit, and would evict for changes that are rolled back.
+    """
+    session = object_session(target)
+    if session is None:
+        for username in usernames:
+            principal_cache.pop(username)
+    else:
+        session.info.setdefault(EVICTED_PRINCIPALS, set()).update(usernames)
+
+@event.listens_for(User, "after_update")
+def _invalidate_updated_principal(mapper, connection, target):
+    state = inspect(target)
+    changed = [field for field in PRINCIPAL_FIELDS if state.attrs[field].history.has_changes()]
+    if changed:
+        usernames = [target.username]
+        if "username" in changed:
+            usernames += state.attrs.username.history.deleted
+        _queue_eviction(target, usernames)
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_principal(mapper, connection, target):
+    _queue_eviction(target, [target.username])
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_principals(session):
+    for username in session.info.pop(EVICTED_PRINCIPALS, ()):
+        principal_cache.pop(username)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_evictions(session):
+    session.info.pop(EVICTED_PRINCIPALS, None)
+
+async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+def get_user_by_username(db: Session, username: str) -> Optional[User]:
+    return db.query(User).filter(User.username == username).first()
+
 def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(User).filter(User.username == username).first()
+    user = get_user_by_username(db, username)
     if not user:
         return False
     if not verify_password(password, user.password_hash):
         return False
     return user
+
+def _store_password_hash(db: Session, user: User, password_hash: str):
+    user.password_hash = password_hash
+    db.commit()
+    db.refresh(user)
+
+async def authenticate_user_async(db: Session, username: str, password: str):
+    """Like ``authenticate_user`` but with bcrypt on ``password_hasher``.
+
+    Hashes made with a different bcrypt cost than ``settings.bcrypt_rounds`` are
+    rehashed once the password has been verified.
+    """
+    user = await run_db(db, get_user_by_username, username)
+    if not user:
+        return False
+    if not await password_hasher.verify(password, user.password_hash):
+        return False
+    if pwd_context.needs_update(user.password_hash):
+        new_hash = await password_hasher.hash(password)
+        await run_db(db, _store_password_hash, user, new_hash)
+    return user
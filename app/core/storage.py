@@ -0,0 +1,255 @@
+"""Where uploaded files live: the local upload directory or an S3-compatible bucket.
+
+Every method is blocking; async callers go through ``run_in_threadpool``.
+"""
+import io
+import os
+from mimetypes import guess_type
+from typing import Iterator, Optional, Tuple
+from app.core.config import settings
+
+# Upload names are never reused for different bytes (content hashes, their
+# variants, or older random names), so clients may keep them indefinitely.
+IMMUTABLE = "public, max-age=31536000, immutable"
+TEMP_PREFIX = ".tmp/"
+
+def _content_type(name: str) -> str:
+    return guess_type(name)[0] or "application/octet-stream"
+
+class LocalWriter:
+    """Chunks of one upload, written to a temporary file in the upload directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.temp_path = os.path.join(directory, f".{os.urandom(16).hex()}.part")
+        self.handle = open(self.temp_path, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self.handle.write(chunk)
+
+    def commit(self, name: str) -> bool:
+        """Move the upload into place as ``name``; returns False when it already existed."""
+        final_path = os.path.join(self.directory, name)
+        self.handle.flush()
+        if os.path.exists(final_path):
+            self.abort()
+            # Fresh mtime keeps the blob out of reach of release/GC during the grace period.
+            os.utime(final_path)
+            return False
+        os.fsync(self.handle.fileno())
+        self.handle.close()
+        os.replace(self.temp_path, final_path)
+        directory = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        return True
+
+    def abort(self) -> None:
+        self.handle.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+class LocalStorage:
+    """Files in ``UPLOAD_DIR``, served by the app itself under ``/static``."""
+
+    name = "local"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def writer(self) -> LocalWriter:
+        os.makedirs(self.directory, exist_ok=True)
+        return LocalWriter(self.directory)
+
+    def exists(self, name: str) -> bool:
+        return os.path.isfile(self.path(name))
+
+    def modified_at(self, name: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.path(name))
+        except FileNotFoundError:
+            return None
+
+    def delete(self, name: str) -> bool:
+        try:
+            os.remove(self.path(name))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def list(self) -> Iterator[Tuple[str, float]]:
+        if not os.path.isdir(self.directory):
+            return
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                yield entry.name, entry.stat().st_mtime
+
+    def url(self, name: str) -> str:
+        return f"/static/{name}"
+
+class S3Writer:
+    """One upload streamed to S3.
+
+    Bodies up to ``s3_part_size`` are buffered and stored with a single PUT once
+    their name (the content hash) is known. Larger ones go to a temporary key as
+    a multipart upload, one part per ``s3_part_size`` bytes, and are copied to
+    their final key on commit.
+    """
+
+    def __init__(self, storage: "S3Storage"):
+        self.storage = storage
+        self.buffer = io.BytesIO()
+        self.temp_key = None
+        self.upload_id = None
+        self.parts = []
+
+    def _flush_part(self) -> None:
+        client, bucket = self.storage.client, self.storage.bucket
+        if self.upload_id is None:
+            self.temp_key = self.storage.key(f"{TEMP_PREFIX}{os.urandom(16).hex()}")
+            self.upload_id = client.create_multipart_upload(Bucket=bucket, Key=self.temp_key)["UploadId"]
+        number = len(self.parts) + 1
+        response = client.upload_part(
+            Bucket=bucket, Key=self.temp_key, UploadId=self.upload_id, PartNumber=number, Body=self.buffer.getvalue()
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": number})
+        self.buffer = io.BytesIO()
+
+    def write(self, chunk: bytes) -> None:
+        self.buffer.write(chunk)
+        if self.buffer.tell() >= settings.s3_part_size:
+            self._flush_part()
+
+    def commit(self, name: str) -> bool:
+        storage = self.storage
+        if storage.exists(name):
+            self.abort()
+            storage.touch(name)
+            return False
+        if self.upload_id is None:
+            storage.client.put_object(
+                Bucket=storage.bucket, Key=storage.key(name), Body=self.buffer.getvalue(), **storage.object_args(name)
+            )
+            return True
+        if self.buffer.tell():
+            self._flush_part()
+        storage.client.complete_multipart_upload(
+            Bucket=storage.bucket, Key=self.temp_key, UploadId=self.upload_id, MultipartUpload={"Parts": self.parts}
+        )
+        self.upload_id = None
+        storage.client.copy_object(
+            Bucket=storage.bucket,
+            Key=storage.key(name),
+            CopySource={"Bucket": storage.bucket, "Key": self.temp_key},
+            MetadataDirective="REPLACE",
+            **storage.object_args(name),
+        )
+        storage.client.delete_object(Bucket=storage.bucket, Key=self.temp_key)
+        return True
+
+    def abort(self) -> None:
+        if self.upload_id is not None:
+            self.storage.client.abort_multipart_upload(
+                Bucket=self.storage.bucket, Key=self.temp_key, UploadId=self.upload_id
+            )
+            self.upload_id = None
+
+class S3Storage:
+    """Objects in an S3-compatible bucket (AWS, MinIO, or moto in tests).
+
+    Clients get ``S3_PUBLIC_URL`` links when the bucket sits behind a CDN or is
+    public, and presigned GET URLs otherwise, so file bytes never pass through
+    the API. ``boto3`` is only imported when this backend is configured.
+    """
+
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", client=None):
+        if client is None:
+            import boto3
+
+            client = boto3.client(
+                "s3",
+                endpoint_url=settings.s3_endpoint_url,
+                region_name=settings.s3_region,
+                aws_access_key_id=settings.s3_access_key_id,
+                aws_secret_access_key=settings.s3_secret_access_key,
+            )
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+
+    def key(self, name: str) -> str:
+        return self.prefix + name
+
+    def object_args(self, name: str) -> dict:
+        return {"ContentType": _content_type(name), "CacheControl": IMMUTABLE}
+
+    def writer(self) -> S3Writer:
+        return S3Writer(self)
+
+    def _head(self, name: str):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.key(name))
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, name: str) -> bool:
+        return self._head(name) is not None
+
+    def modified_at(self, name: str) -> Optional[float]:
+        head = self._head(name)
+        return head["LastModified"].timestamp() if head else None
+
+    def touch(self, name: str) -> None:
+        """Refresh the object's LastModified by copying it onto itself."""
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=self.key(name),
+            CopySource={"Bucket": self.bucket, "Key": self.key(name)},
+            MetadataDirective="REPLACE",
+            **self.object_args(name),
+        )
+
+    def delete(self, name: str) -> bool:
+        if not self.exists(name):
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(name))
+        return True
+
+    def list(self) -> Iterator[Tuple[str, float]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                yield item["Key"][len(self.prefix):], item["LastModified"].timestamp()
+
+    def url(self, name: str) -> str:
+        if settings.s3_public_url:
+            return f"{settings.s3_public_url.rstrip('/')}/{self.key(name)}"
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.key(name)},
+            ExpiresIn=settings.s3_presign_expires_seconds,
+        )
+
+    def download(self, name: str, path: str) -> None:
+        self.client.download_file(self.bucket, self.key(name), path)
+
+    def put_file(self, name: str, path: str) -> None:
+        self.client.upload_file(path, self.bucket, self.key(name), ExtraArgs=self.object_args(name))
+
+def build_storage():
+    if settings.storage_backend == "s3":
+        return S3Storage(settings.s3_bucket, settings.s3_prefix)
+    return LocalStorage(settings.upload_dir)
+
+storage = build_storage()
@@ -1,15 +1,28 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
-from app.core.database import engine
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse
+from app.core.config import settings
+from app.core.counters import ensure_counters
+from app.core.database import SessionLocal, engine, is_async_database, with_async_session
+from app.core.images import shutdown_pool
+from app.core.metrics import RequestMetrics, render_metrics
+from app.core.profiling import QueryProfiler
+from app.core.search import search_index
+from app.core.storage import LocalStorage, storage
 import logging
 from app.models import Base
-from app.api import auth, stores, offers, upload, dashboard, subscriptions
+from app.api import auth, stores, offers, upload, dashboard, subscriptions, internal
+from app.core.security import get_current_user
 from app.schemas import ErrorResponse
+from app.utils.helpers import UploadSizeLimit
+from app.utils.static import CachedStaticFiles
 import os
+import secrets
 
 Base.metadata.create_all(bind=engine)
+search_index.install(engine)
+with SessionLocal() as db:
+    ensure_counters(db)
 
 app = FastAPI(
     title="Zhwaweb Admin API",
@@ -17,6 +30,11 @@ app = FastAPI(
     version="1.0.0"
 )
 
+if is_async_database:
+    app.dependency_overrides[get_current_user] = with_async_session(get_current_user)
+
+app.add_middleware(UploadSizeLimit)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -25,10 +43,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-if not os.path.exists("uploads"):
-    os.makedirs("uploads")
+def mount_static(app: FastAPI, storage) -> None:
+    """Serve ``/static`` from the upload directory, or redirect it to the object store."""
+    if isinstance(storage, LocalStorage):
+        if not os.path.exists(storage.directory):
+            os.makedirs(storage.directory)
+        app.mount("/static", CachedStaticFiles(directory=storage.directory), name="static")
+        return
 
-app.mount("/static", StaticFiles(directory="uploads"), name="static")
+    @app.get("/static/{filename}", include_in_schema=False)
+    def static_redirect(filename: str):
+        """Old ``/static`` links keep working by redirecting to the object store."""
+        return RedirectResponse(storage.url(filename), status_code=307)
+
+mount_static(app, storage)
 
 app.include_router(auth.router)
 app.include_router(stores.router)
@@ -36,6 +64,7 @@ app.include_router(offers.router)
 app.include_router(upload.router)
 app.include_router(dashboard.router)
 app.include_router(subscriptions.router)
+app.include_router(internal.router)
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
@@ -44,7 +73,8 @@ async def http_exception_handler(request, exc):
         content=ErrorResponse(
             error="HTTP Error",
             message=exc.detail
-        ).dict()
+        ).dict(),
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
@@ -80,6 +110,26 @@ async def convert_auth_errors(request: Request, call_next):
         traceback.print_exc()
         raise
 
+app.add_middleware(QueryProfiler)
+
+if settings.metrics_enabled:
+    app.add_middleware(RequestMetrics)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics(request: Request):
+        if not settings.metrics_token:
+            raise HTTPException(status_code=404, detail="Not Found")
+        supplied = request.headers.get("authorization", "").encode()
+        if not secrets.compare_digest(supplied, f"Bearer {settings.metrics_token}".encode()):
+            raise HTTPException(
+                status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"}
+            )
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.on_event("shutdown")
+def stop_image_workers():
+    shutdown_pool()
+
 @app.get("/")
 def read_root():
     return {"message": "Zhwaweb Admin API", "version": "1.0.0"}
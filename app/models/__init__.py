@@ -1,8 +1,11 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, ForeignKey, Index
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.orderinglist import ordering_list
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
+from app.core.search import search_index
 
 Base = declarative_base()
 
@@ -34,13 +37,29 @@ class Store(Base):
     phone = Column(String(20), nullable=False)
     email = Column(String(100), nullable=False)
     owner_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"))
-    products = Column(Text)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     owner = relationship("User", back_populates="stores")
     offers = relationship("Offer", back_populates="store")
+    product_rows = relationship(
+        "StoreProduct",
+        order_by="StoreProduct.position",
+        collection_class=ordering_list("position"),
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin",
+    )
+    products = association_proxy("product_rows", "name", creator=lambda name: StoreProduct(name=name))
+    
+    __table_args__ = (
+        Index("ix_stores_created_at_id", "created_at", "id"),
+        Index("ix_stores_owner_id_created_at", "owner_id", "created_at", "id"),
+        Index("ix_stores_city_created_at", "city", "created_at", "id"),
+        Index("ix_stores_sector_created_at", "sector", "created_at", "id"),
+        Index("ix_stores_image", "image"),
+    )
 
 class Offer(Base):
     __tablename__ = "offers"
@@ -57,6 +76,13 @@ class Offer(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     store = relationship("Store", back_populates="offers")
+    
+    __table_args__ = (
+        Index("ix_offers_created_at_id", "created_at", "id"),
+        Index("ix_offers_store_id_is_active_created_at", "store_id", "is_active", "created_at", "id"),
+        Index("ix_offers_is_active_created_at", "is_active", "created_at", "id"),
+        Index("ix_offers_image", "image"),
+    )
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
@@ -72,9 +98,67 @@ class Subscription(Base):
     phone = Column(String(20), nullable=False)
     email = Column(String(100), nullable=False)
     user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
-    products = Column(Text)
     status = Column(String(20), default="pending")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     user = relationship("User", back_populates="subscriptions")
+    product_rows = relationship(
+        "SubscriptionProduct",
+        order_by="SubscriptionProduct.position",
+        collection_class=ordering_list("position"),
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin",
+    )
+    products = association_proxy("product_rows", "name", creator=lambda name: SubscriptionProduct(name=name))
+    
+    __table_args__ = (
+        Index("ix_subscriptions_created_at_id", "created_at", "id"),
+        Index("ix_subscriptions_email", "email"),
+        Index("ix_subscriptions_status_created_at", "status", "created_at", "id"),
+        Index("ix_subscriptions_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_subscriptions_image", "image"),
+    )
+
+class StoreProduct(Base):
+    """One product a store sells; ``Store.products`` proxies the names in order."""
+    __tablename__ = "store_products"
+    
+    store_id = Column(String(36), ForeignKey("stores.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_store_products_name_store_id", "name", "store_id"),
+    )
+
+class SubscriptionProduct(Base):
+    __tablename__ = "subscription_products"
+    
+    subscription_id = Column(String(36), ForeignKey("subscriptions.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False)
+
+class EntityCounter(Base):
+    """Store and offer totals per owner, plus one row for the global scope."""
+    __tablename__ = "entity_counters"
+    
+    scope = Column(String(36), primary_key=True)
+    total_stores = Column(Integer, nullable=False, default=0)
+    active_stores = Column(Integer, nullable=False, default=0)
+    total_offers = Column(Integer, nullable=False, default=0)
+    active_offers = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ImageVariant(Base):
+    """A resized/re-encoded copy of an uploaded image, keyed by the original's filename."""
+    __tablename__ = "image_variants"
+    
+    source = Column(String(255), primary_key=True)
+    width = Column(Integer, primary_key=True)
+    filename = Column(String(255), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+search_index.register(Store, "name", "description")
+search_index.register(Offer, "title", "description")
@@ -1,7 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from typing import Optional, List
 
+MAX_BULK_ITEMS = 1000
+
 class OfferBase(BaseModel):
     title: str
     description: Optional[str] = None
@@ -27,12 +29,45 @@ class OfferResponse(OfferBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     store_name: Optional[str] = None
+    image_srcset: Optional[str] = None
     
     class Config:
         from_attributes = True
 
 class OfferListResponse(BaseModel):
     offers: List[OfferResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     limit: int
+    next_cursor: Optional[str] = None
+
+class OfferBulkCreate(BaseModel):
+    offers: List[OfferCreate] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class OfferBulkUpdateItem(OfferUpdate):
+    id: str
+    
+    @field_validator("title", "discount_percentage", "valid_until", "is_active")
+    @classmethod
+    def not_null(cls, value):
+        # These columns are NOT NULL: leave them out to keep the current value.
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+class OfferBulkUpdate(BaseModel):
+    offers: List[OfferBulkUpdateItem] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class OfferBulkDelete(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str
+    detail: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
@@ -37,12 +37,14 @@ class StoreResponse(StoreBase):
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
+    image_srcset: Optional[str] = None
     
     class Config:
         from_attributes = True
 
 class StoreListResponse(BaseModel):
     stores: List[StoreResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     limit: int
+    next_cursor: Optional[str] = None
@@ -1,7 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import List, Optional
 
+MAX_BATCH_IDS = 1000
+
 class SubscriptionBase(BaseModel):
     name: str
     sector: str
@@ -42,6 +44,20 @@ class SubscriptionResponse(SubscriptionBase):
 
 class SubscriptionListResponse(BaseModel):
     subscriptions: List[SubscriptionResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     limit: int
+    next_cursor: Optional[str] = None
+
+class SubscriptionBatchStatus(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+    status: str = Field(..., pattern="^(approved|rejected)$")
+
+class SkippedSubscription(BaseModel):
+    id: str
+    reason: str
+
+class SubscriptionBatchStatusResponse(BaseModel):
+    status: str
+    updated: List[str]
+    skipped: List[SkippedSubscription]
@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+class RedisCache:
+    """Cache shared between worker processes through Redis.
+
+    Values must be JSON-serializable; ``redis`` is only imported when a
+    ``SHARED_CACHE_URL`` is configured.
+    """
+
+    def __init__(self, url: str, namespace: str, ttl: float = 60.0):
+        import redis
+
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._client = redis.Redis.from_url(url)
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        raw = self._client.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._client.set(self._key(key), json.dumps(value, default=str), px=max(1, int(ttl * 1000)))
+
+    def pop(self, key: Hashable) -> None:
+        self._client.delete(self._key(key))
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=f"{self.namespace}:*"))
+        if keys:
+            self._client.delete(*keys)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+async def run_cache(method, *args):
+    """Call a cache method from async code; Redis round trips go to the threadpool."""
+    if isinstance(getattr(method, "__self__", None), RedisCache):
+        return await run_in_threadpool(method, *args)
+    return method(*args)
+
+def build_cache(namespace: str, maxsize: int, ttl: float, shared: bool = False):
+    """In-process cache, or a Redis-backed one when ``shared`` and configured."""
+    if shared and settings.shared_cache_url:
+        return RedisCache(settings.shared_cache_url, namespace, ttl)
+    return TTLCache(maxsize=maxsize, ttl=ttl)
+
+# Rendered /dashboard/stats payloads per principal; every store, offer or
+# subscription write clears it.
+dashboard_cache = build_cache(
+    "dashboard",
+    maxsize=1024,
+    ttl=settings.dashboard_cache_ttl_seconds,
+    shared=True,
+)
+
+# Memoized exact COUNT(*) totals of the list endpoints, per filter set; see
+# ``app.utils.pagination.count_total``.
+exact_counts = TTLCache(maxsize=2048, ttl=settings.count_cache_ttl_seconds)
+
+def invalidate_dashboard_stats() -> None:
+    """Drop the cached dashboard payloads and this worker's exact list totals.
+
+    Both are derived from the rows every store, offer and subscription write
+    changes, so the writes clear them together.
+    """
+    dashboard_cache.clear()
+    exact_counts.clear()
@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+from typing import Callable, Iterator, Type
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.utils.serialization import dump_json
+
+EXPORT_FORMAT_PATTERN = "^(ndjson|csv)$"
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def _stream_rows(build_query: Callable) -> Iterator:
+    """Yield the rows of ``build_query(session)`` through a server-side cursor.
+
+    The export runs on its own sync session rather than the request's: the
+    response body is produced after the endpoint returns, and with an async
+    driver the request session cannot be iterated from the threadpool.
+    """
+    with SessionLocal() as db:
+        query = build_query(db).execution_options(stream_results=True)
+        yield from query.yield_per(settings.export_batch_size)
+
+def _ndjson(rows: Iterator, serialize: Callable[..., BaseModel]) -> Iterator[bytes]:
+    batch = []
+    for row in rows:
+        batch.append(dump_json(serialize(row).model_dump()))
+        if len(batch) >= settings.export_batch_size:
+            yield b"\n".join(batch) + b"\n"
+            batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+def _csv_cell(value):
+    # Lists (products) are written as a JSON array: names may contain any
+    # delimiter, and a JSON cell splits back unambiguously.
+    if isinstance(value, list):
+        return json.dumps(value, ensure_ascii=False)
+    return "" if value is None else value
+
+def _csv(rows: Iterator, serialize: Callable[..., BaseModel], model: Type[BaseModel]) -> Iterator[bytes]:
+    fields = list(model.model_fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so spreadsheet apps pick UTF-8 for the Arabic text.
+    buffer.write("\ufeff")
+    writer.writerow(fields)
+    count = 0
+    for row in rows:
+        values = serialize(row).model_dump(mode="json")
+        writer.writerow([_csv_cell(values[field]) for field in fields])
+        count += 1
+        if count % settings.export_batch_size == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+def export_response(
+    build_query: Callable,
+    serialize: Callable[..., BaseModel],
+    model: Type[BaseModel],
+    fmt: str,
+    name: str,
+) -> StreamingResponse:
+    """Stream every row of ``build_query(session)`` as NDJSON or CSV.
+
+    Rows are fetched ``export_batch_size`` at a time and written out per batch,
+    so memory stays flat however many rows are exported.
+    """
+    rows = _stream_rows(build_query)
+    body = _ndjson(rows, serialize) if fmt == "ndjson" else _csv(rows, serialize, model)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
@@ -1,49 +1,191 @@
+import hashlib
 import os
-import shutil
-from typing import List
+import time
+from typing import Iterable, List, Optional, Tuple
 from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, select
 from app.core.config import settings
+from app.core.storage import LocalStorage, storage
+from app.models import ImageVariant, Offer, Store, Subscription
+from app.schemas import ErrorResponse
 
-def validate_file_type(file: UploadFile) -> bool:
-    if not file.filename:
-        return False
-    file_extension = file.filename.split('.')[-1].lower()
-    return file_extension in settings.allowed_image_types
-
-def validate_file_size(file: UploadFile) -> bool:
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-    return file_size <= settings.max_file_size
-
-def save_uploaded_file(file: UploadFile, upload_dir: str = None) -> str:
-    if upload_dir is None:
-        upload_dir = settings.upload_dir
-    
-    if not os.path.exists(upload_dir):
-        os.makedirs(upload_dir)
-    
-    if not validate_file_type(file):
+# Leading bytes of each accepted image format and the extension it is stored under.
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+# Multipart boundaries and part headers around the file itself.
+MULTIPART_OVERHEAD = 64 * 1024
+
+def detect_image_type(head: bytes) -> Optional[str]:
+    """Extension for ``head`` judged by its magic bytes, if it is an allowed image."""
+    allowed = set(settings.allowed_image_types)
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            if extension in allowed or (extension == "jpg" and "jpeg" in allowed):
+                return extension
+            return None
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP" and "webp" in allowed:
+        return "webp"
+    return None
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail="File too large")
+
+def _backend(upload_dir: Optional[str]):
+    return LocalStorage(upload_dir) if upload_dir is not None else storage
+
+async def save_uploaded_file(file: UploadFile, upload_dir: str = None) -> Tuple[str, int]:
+    """Stream ``file`` into storage and return ``(filename, size)``.
+
+    Chunks go to the backend's writer as they arrive (a temporary file next to
+    the target, or an S3 multipart upload); the upload is rejected as soon as
+    the running size passes ``max_file_size`` or the first bytes are not an
+    allowed image. Files are named by the SHA-256 of their content, so an
+    identical upload resolves to the blob already stored and the copy is
+    dropped. New files only appear under their name once complete.
+    """
+    backend = _backend(upload_dir)
+
+    head = await file.read(settings.upload_chunk_size)
+    extension = detect_image_type(head)
+    if extension is None:
         raise HTTPException(status_code=400, detail="Invalid file type")
-    
-    if not validate_file_size(file):
-        raise HTTPException(status_code=400, detail="File too large")
-    
-    file_extension = file.filename.split('.')[-1].lower()
-    filename = f"{os.urandom(16).hex()}.{file_extension}"
-    file_path = os.path.join(upload_dir, filename)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    return filename
-
-def delete_file(filename: str, upload_dir: str = None) -> bool:
-    if upload_dir is None:
-        upload_dir = settings.upload_dir
-    
-    file_path = os.path.join(upload_dir, filename)
-    if os.path.exists(file_path):
-        os.remove(file_path)
-        return True
-    return False
+
+    writer = await run_in_threadpool(backend.writer)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        chunk = head
+        while chunk:
+            size += len(chunk)
+            if size > settings.max_file_size:
+                raise _too_large()
+            digest.update(chunk)
+            await run_in_threadpool(writer.write, chunk)
+            chunk = await file.read(settings.upload_chunk_size)
+        filename = f"{digest.hexdigest()}.{extension}"
+        await run_in_threadpool(writer.commit, filename)
+    except BaseException:
+        await run_in_threadpool(writer.abort)
+        raise
+
+    return filename, size
+
+def image_references(db, filename: str) -> int:
+    """How many stores, offers and subscriptions use ``filename`` as their image."""
+    counts = [
+        select(func.count()).select_from(model).where(model.image == filename).scalar_subquery()
+        for model in (Store, Offer, Subscription)
+    ]
+    return db.execute(select(counts[0] + counts[1] + counts[2])).scalar()
+
+def _in_grace_period(modified_at: float) -> bool:
+    return time.time() - modified_at < settings.upload_gc_grace_seconds
+
+def delete_file(filename: str, db=None, upload_dir: str = None) -> bool:
+    """Remove an upload and its variants once nothing points to it.
+
+    With ``db`` the blob is kept while any row still references it, and also
+    while it is within ``upload_gc_grace_seconds`` of its last upload, since a
+    fresh upload is not attached to its store or offer yet.
+    """
+    backend = _backend(upload_dir)
+
+    if os.path.basename(filename) != filename or filename.startswith("."):
+        return False
+    modified_at = backend.modified_at(filename)
+    if modified_at is None:
+        return False
+    if db is not None:
+        if image_references(db, filename) or _in_grace_period(modified_at):
+            return False
+        variants = db.execute(select(ImageVariant.filename).where(ImageVariant.source == filename)).scalars().all()
+        db.execute(delete(ImageVariant).where(ImageVariant.source == filename))
+        db.commit()
+        for variant in variants:
+            backend.delete(variant)
+    return backend.delete(filename)
+
+def release_images(db, filenames: Iterable[Optional[str]]) -> None:
+    """Call after committing a delete or image change; drops blobs left unreferenced."""
+    for filename in set(filter(None, filenames)):
+        delete_file(filename, db)
+
+def collect_orphaned_uploads(db, upload_dir: str = None, dry_run: bool = False) -> List[str]:
+    """Delete stored files that no row references; returns their names.
+
+    A variant counts as referenced while its original is. Files (including
+    abandoned ``.part`` temporaries) modified within ``upload_gc_grace_seconds``
+    are kept, as they may belong to an upload still in progress.
+    """
+    backend = _backend(upload_dir)
+
+    referenced = set()
+    for model in (Store, Offer, Subscription):
+        referenced.update(db.execute(select(model.image).where(model.image.isnot(None)).distinct()).scalars())
+    variants = db.execute(select(ImageVariant.source, ImageVariant.filename)).all()
+    referenced.update(variant for source, variant in variants if source in referenced)
+
+    orphans = []
+    for name, modified_at in sorted(backend.list()):
+        if name in referenced or _in_grace_period(modified_at):
+            continue
+        orphans.append(name)
+        if not dry_run:
+            backend.delete(name)
+
+    stale_sources = {source for source, _ in variants if source not in referenced and source in orphans}
+    if stale_sources and not dry_run:
+        db.execute(delete(ImageVariant).where(ImageVariant.source.in_(stale_sources)))
+        db.commit()
+    return orphans
+
+class UploadSizeLimit:
+    """ASGI middleware that stops reading upload requests past ``max_file_size``.
+
+    Starlette spools the whole multipart body before the endpoint runs, so the
+    limit has to be enforced while the body is received: a too-large
+    ``Content-Length`` is refused before anything is read, and a body without
+    one is cut off as soon as it overruns.
+    """
+
+    def __init__(self, app, prefix: str = "/upload"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            return await self.app(scope, receive, send)
+
+        limit = settings.max_file_size + MULTIPART_OVERHEAD
+        headers = dict(scope["headers"])
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            return await self._reject(send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send):
+        body = ErrorResponse(error="HTTP Error", message="File too large").model_dump_json().encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
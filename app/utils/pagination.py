@@ -0,0 +1,117 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import func, literal, select, tuple_
+from app.core.config import settings
+from app.utils.cache import TTLCache, exact_counts
+
+TOTAL_MODE_PATTERN = "^(exact|estimate|none)$"
+
+_estimated_counts = TTLCache(maxsize=2048, ttl=settings.count_estimate_ttl_seconds)
+
+def encode_cursor(row) -> str:
+    created_at = row.created_at.isoformat() if row.created_at else None
+    payload = json.dumps([created_at, row.id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(row_id, str):
+            raise ValueError("cursor id must be a string")
+        return (datetime.fromisoformat(created_at) if created_at else None), row_id
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def seek_after(model, cursor: str):
+    """Rows strictly after the cursor in (created_at DESC, id DESC) order.
+
+    The anchor timestamp is re-read from the anchor row itself so the comparison
+    is column-to-column; SQLite stores server-default timestamps without the
+    microseconds SQLAlchemy renders into bound datetimes. The value carried in
+    the cursor is only used when the anchor row has since been deleted.
+    """
+    created_at, last_id = decode_cursor(cursor)
+    anchor = func.coalesce(
+        select(model.created_at).where(model.id == last_id).correlate(None).scalar_subquery(),
+        literal(created_at, model.created_at.type),
+    )
+    return tuple_(model.created_at, model.id) < tuple_(anchor, literal(last_id, model.id.type))
+
+def paginate(query, model, page: int, limit: int, cursor: Optional[str] = None, rank=None):
+    """Return one page of ``query`` and the cursor of the page that follows.
+
+    Without a cursor the page is addressed by ``page`` (OFFSET); with one the
+    query seeks past the cursor instead, so deep pages cost the same as the first.
+    Endpoints pass an empty ``?cursor=`` through as ``None``.
+
+    A search ``rank`` orders the rows by relevance when no cursor is given. The
+    cursor key is (created_at, id) only, so such pages are addressed by ``page``
+    alone and never return a cursor; a cursor keeps the chronological order.
+    """
+    ranked = rank is not None and not cursor
+    if ranked:
+        query = query.order_by(rank.desc())
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        query = query.filter(seek_after(model, cursor))
+    elif page > 1:
+        query = query.offset((page - 1) * limit)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit and not ranked else None
+    return rows[:limit], next_cursor
+
+def _count_key(query, dialect):
+    compiled = query.statement.compile(dialect=dialect)
+    key = (compiled.string, tuple(sorted(compiled.params.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+def _planner_estimate(query, dialect) -> Optional[int]:
+    compiled = query.statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    plan = query.session.connection().exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + compiled.string, params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+def count_total(query, mode: str = "exact") -> Optional[int]:
+    """Total row count for a list query according to the requested ``total_mode``.
+
+    ``exact`` runs ``COUNT(*)`` and memoizes it for the same filter set for
+    ``count_cache_ttl_seconds``; writes clear the memo of the worker serving
+    them, so other workers may lag by up to that long. ``estimate`` asks the PostgreSQL planner and
+    elsewhere serves a count cached for ``count_estimate_ttl_seconds``.
+    ``none`` skips counting.
+    """
+    if mode == "none":
+        return None
+
+    dialect = query.session.get_bind().dialect
+    if mode == "estimate" and dialect.name == "postgresql":
+        return _planner_estimate(query, dialect)
+
+    key = _count_key(query, dialect)
+    if key is None:
+        return query.count()
+
+    total = exact_counts.get(key)
+    if total is None and mode == "estimate":
+        total = _estimated_counts.get(key)
+    if total is None:
+        total = query.count()
+        exact_counts.set(key, total)
+        _estimated_counts.set(key, total)
+    return total
@@ -0,0 +1,141 @@
+"""Index advisor: replay the list endpoints' queries through EXPLAIN.
+
+The read endpoints are called directly with a transient admin and store owner,
+every SELECT they send is captured from the engine and explained. On SQLite a
+``SCAN <table>`` step (no index) is a sequential scan; on PostgreSQL the plans
+are taken with ``enable_seqscan`` off, so a remaining ``Seq Scan`` means no
+usable index exists rather than the planner preferring one on a small table.
+"""
+import contextlib
+import json
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, List, Tuple
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models import Store, User
+from app.utils.pagination import encode_cursor
+
+def _scenarios(admin: User, owner: User, store_id: str) -> List[Tuple[str, Callable[[Session], object]]]:
+    from app.api import dashboard, offers, stores, subscriptions
+
+    cursor = encode_cursor(SimpleNamespace(created_at=datetime.now(timezone.utc), id=str(uuid.uuid4())))
+    list_args = {"page": 1, "limit": 10, "total_mode": "exact"}
+
+    # The read endpoints are async; their responses are built by these sync helpers.
+    def stores_list(user, **filters):
+        params = {"search": None, "city": None, "sector": None, "product": None, "cursor": None, **list_args, **filters}
+        return lambda db: stores._store_page(db=db, current_user=user, **params)
+
+    def offers_list(user, **filters):
+        params = {"search": None, "store_id": None, "active_only": True, "cursor": None, **list_args, **filters}
+        return lambda db: offers._offer_page(db=db, current_user=user, **params)
+
+    def subscriptions_list(user, **filters):
+        params = {"status": None, "cursor": None, **list_args, **filters}
+        return lambda db: subscriptions._subscription_page(db=db, current_user=user, **params)
+
+    return [
+        ("GET /stores", stores_list(admin)),
+        ("GET /stores?cursor", stores_list(admin, cursor=cursor)),
+        ("GET /stores?city", stores_list(admin, city="الرياض")),
+        ("GET /stores?sector", stores_list(admin, sector="مطاعم")),
+        ("GET /stores?product", stores_list(admin, product="قهوة")),
+        ("GET /stores?search", stores_list(admin, search="قهوة")),
+        ("GET /stores (store owner)", stores_list(owner)),
+        ("GET /offers", offers_list(admin)),
+        ("GET /offers?cursor", offers_list(admin, cursor=cursor)),
+        ("GET /offers?active_only=false", offers_list(admin, active_only=False)),
+        ("GET /offers?store_id", offers_list(admin, store_id=store_id)),
+        ("GET /offers?search", offers_list(admin, search="خصم")),
+        ("GET /offers (store owner)", offers_list(owner)),
+        ("GET /subscriptions", subscriptions_list(admin)),
+        ("GET /subscriptions?status", subscriptions_list(admin, status="pending")),
+        ("GET /subscriptions (store owner)", subscriptions_list(owner)),
+        ("GET /subscriptions/check/{email}", lambda db: subscriptions._subscription_by_email(
+            db, email="owner@example.com"
+        )),
+        ("GET /dashboard/stats", lambda db: dashboard._dashboard_payload(db, current_user=admin)),
+        ("GET /dashboard/stats (store owner)", lambda db: dashboard._dashboard_payload(db, current_user=owner)),
+    ]
+
+@contextlib.contextmanager
+def capture_selects(bind):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", before_cursor_execute)
+
+def explain(connection, statement: str, parameters) -> List[str]:
+    """Plan lines for one driver-level statement."""
+    if connection.dialect.name == "postgresql":
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        lines = []
+        nodes = [(plan[0]["Plan"], 0)]
+        while nodes:
+            node, depth = nodes.pop()
+            relation = f" on {node['Relation Name']}" if "Relation Name" in node else ""
+            index = f" using {node['Index Name']}" if "Index Name" in node else ""
+            lines.append("  " * depth + node["Node Type"] + relation + index)
+            nodes.extend((child, depth + 1) for child in reversed(node.get("Plans", [])))
+        return lines
+    if connection.dialect.name == "sqlite":
+        return [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+    return [" ".join(str(value) for value in row) for row in connection.exec_driver_sql("EXPLAIN " + statement, parameters)]
+
+def sequential_scans(dialect_name: str, plan: List[str]) -> List[str]:
+    if dialect_name == "postgresql":
+        return [line.strip() for line in plan if line.strip().startswith("Seq Scan")]
+    if dialect_name == "sqlite":
+        return [
+            line for line in plan
+            if line.startswith("SCAN ") and " USING " not in line and "VIRTUAL TABLE" not in line
+            and not line.startswith("SCAN CONSTANT ROW")
+        ]
+    return [line for line in plan if "ALL" in line.split()]
+
+def advise(db: Session) -> List[dict]:
+    """Explain every SELECT the read endpoints issue and flag sequential scans."""
+    owner_row = db.query(User.id).filter(User.type == "store").first()
+    owner = User(id=owner_row.id if owner_row else str(uuid.uuid4()), username="advisor", type="store", is_active=True)
+    admin = User(id=str(uuid.uuid4()), username="advisor-admin", type="admin", is_active=True)
+    store_id = db.query(Store.id).limit(1).scalar() or str(uuid.uuid4())
+
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+    report = []
+    seen = set()
+    for name, call in _scenarios(admin, owner, store_id):
+        with capture_selects(connection) as statements:
+            try:
+                call(db)
+            except (HTTPException, ValueError):
+                # Only the statements matter here; a 404 or a row the response
+                # model rejects does not change what was sent to the database.
+                pass
+        for statement, parameters in statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            plan = explain(connection, statement, parameters)
+            report.append({
+                "endpoint": name,
+                "statement": " ".join(statement.split()),
+                "plan": plan,
+                "sequential_scans": sequential_scans(connection.dialect.name, plan),
+            })
+    db.rollback()
+    return report
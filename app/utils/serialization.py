@@ -0,0 +1,76 @@
+from typing import Any, Dict, Optional, Type, TypeVar
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+from app.core.storage import storage
+from app.schemas.offer import OfferResponse
+from app.schemas.store import StoreResponse
+from app.schemas.subscription import SubscriptionResponse
+
+try:
+    import orjson
+except ImportError:  # fall back to pydantic's own JSON encoder
+    orjson = None
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Field names per response model, resolved once instead of per row.
+_FIELDS = {
+    model: tuple(model.model_fields)
+    for model in (StoreResponse, SubscriptionResponse, OfferResponse)
+}
+
+def static_url(image: Optional[str]) -> Optional[str]:
+    return storage.url(image) if image else image
+
+def construct(model: Type[ModelT], source: Any, **overrides) -> ModelT:
+    """Build ``model`` from the matching attributes of an ORM object or row.
+
+    The values come straight from the database, so they are not validated again;
+    ``model_construct`` only assigns them.
+    """
+    values = {name: getattr(source, name, None) for name in _FIELDS[model] if name not in overrides}
+    values.update(overrides)
+    return model.model_construct(**values)
+
+def store_response(store, srcsets: Optional[Dict[str, str]] = None) -> StoreResponse:
+    """``srcsets`` maps image filenames to their variants, see ``app.core.images.image_srcsets``."""
+    return construct(
+        StoreResponse,
+        store,
+        products=list(store.products),
+        image=static_url(store.image),
+        image_srcset=(srcsets or {}).get(store.image),
+    )
+
+def subscription_response(subscription) -> SubscriptionResponse:
+    return construct(
+        SubscriptionResponse,
+        subscription,
+        products=list(subscription.products),
+        image=static_url(subscription.image),
+    )
+
+def offer_response(offer, store_name: Optional[str] = None, srcsets: Optional[Dict[str, str]] = None) -> OfferResponse:
+    """``offer`` is an ``Offer`` or a row from ``offer_rows_query`` (which has ``store_name``)."""
+    overrides = {"image_srcset": (srcsets or {}).get(offer.image)}
+    if store_name is not None:
+        overrides["store_name"] = store_name
+    return construct(OfferResponse, offer, **overrides)
+
+def dump_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return to_json(content)
+
+def json_response(content: Any, status_code: int = 200) -> Response:
+    """Render plain data (dicts, lists, datetimes) without FastAPI's encoder pass."""
+    return Response(content=dump_json(content), status_code=status_code, media_type="application/json")
+
+def render(model: BaseModel, status_code: int = 200) -> Response:
+    """Render a response model directly.
+
+    Returning a ``Response`` skips FastAPI's ``response_model`` re-validation;
+    the route keeps ``response_model`` for the OpenAPI schema only.
+    """
+    return json_response(model.model_dump(), status_code=status_code)
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import re
+from email.utils import formatdate
+from mimetypes import guess_type
+from typing import Optional, Tuple
+import anyio
+from starlette.datastructures import Headers
+from starlette.staticfiles import StaticFiles
+from app.core.storage import IMMUTABLE
+from app.utils.cache import TTLCache
+
+CONTENT_ADDRESSED = re.compile(r"^([0-9a-f]{64})\.[a-z0-9]+$")
+# Precompressed copies looked for next to a file, in order of preference.
+SIDECARS = (("br", ".br"), ("gzip", ".gz"))
+CHUNK_SIZE = 64 * 1024
+
+_etags = TTLCache(maxsize=65536, ttl=86400.0)
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def strong_etag(path: str, stat_result: os.stat_result) -> str:
+    """Quoted SHA-256 of the file, hashed once per (path, mtime, size).
+
+    Content-addressed uploads already carry their hash in the name.
+    """
+    match = CONTENT_ADDRESSED.match(os.path.basename(path))
+    if match:
+        return f'"{match.group(1)}"'
+    key = (path, stat_result.st_mtime_ns, stat_result.st_size)
+    etag = _etags.get(key)
+    if etag is None:
+        etag = f'"{await anyio.to_thread.run_sync(_hash_file, path)}"'
+        _etags.set(key, etag)
+    return etag
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """``(start, end)`` inclusive for a single ``bytes=`` range.
+
+    Returns ``None`` when the whole file should be sent (no header, several
+    ranges, or a unit other than bytes) and raises ``ValueError`` when the range
+    cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    if not first.isdigit() and not last.isdigit():
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last.isdigit() else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+def _sidecar(path: str, accept_encoding: str):
+    accepted = {token.split(";")[0].strip() for token in accept_encoding.split(",")}
+    for encoding, suffix in SIDECARS:
+        if encoding in accepted:
+            try:
+                return encoding, path + suffix, os.stat(path + suffix)
+            except FileNotFoundError:
+                continue
+    return None
+
+def _has_sidecar(path: str) -> bool:
+    return any(os.path.exists(path + suffix) for _, suffix in SIDECARS)
+
+class StaticFileResponse:
+    """Serve one static file with strong ETags, immutable caching and byte ranges.
+
+    Uses the server's ``http.response.zerocopysend`` extension (sendfile) when
+    offered and streams the file in chunks otherwise.
+    """
+
+    def __init__(self, path: str, stat_result: os.stat_result, scope):
+        self.path = path
+        self.stat_result = stat_result
+        self.method = scope["method"].upper()
+        self.request_headers = Headers(scope=scope)
+        self.zero_copy = "http.response.zerocopysend" in (scope.get("extensions") or {})
+
+    async def __call__(self, scope, receive, send):
+        path, stat_result = self.path, self.stat_result
+        headers = {
+            "content-type": guess_type(path)[0] or "application/octet-stream",
+            "cache-control": IMMUTABLE,
+            "accept-ranges": "bytes",
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        }
+        etag = await strong_etag(path, stat_result)
+
+        range_header = self.request_headers.get("range")
+        if_range = self.request_headers.get("if-range")
+        if if_range is not None and if_range != etag:
+            range_header = None
+
+        if range_header is None and await anyio.to_thread.run_sync(_has_sidecar, path):
+            headers["vary"] = "Accept-Encoding"
+            sidecar = await anyio.to_thread.run_sync(
+                _sidecar, path, self.request_headers.get("accept-encoding", "")
+            )
+            if sidecar is not None:
+                encoding, path, stat_result = sidecar
+                headers["content-encoding"] = encoding
+                etag = f'{etag[:-1]}-{encoding}"'
+        headers["etag"] = etag
+
+        if_none_match = self.request_headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+            return await self._send(send, 304, headers)
+
+        size = stat_result.st_size
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            headers["content-range"] = f"bytes */{size}"
+            return await self._send(send, 416, dict(headers, **{"content-length": "0"}))
+
+        status, start, end = 200, 0, size - 1
+        if byte_range is not None:
+            status, (start, end) = 206, byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+        headers["content-length"] = str(end - start + 1)
+        await self._send(send, status, headers, path, start, end - start + 1)
+
+    async def _send(self, send, status: int, headers: dict, path: str = None, offset: int = 0, count: int = 0):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(key.encode("latin-1"), value.encode("latin-1")) for key, value in headers.items()],
+        })
+        if path is None or self.method == "HEAD" or count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if self.zero_copy:
+            file = await anyio.to_thread.run_sync(open, path, "rb")
+            try:
+                await send({"type": "http.response.zerocopysend", "file": file, "offset": offset, "count": count})
+            finally:
+                await anyio.to_thread.run_sync(file.close)
+            return
+
+        async with await anyio.open_file(path, mode="rb") as file:
+            await file.seek(offset)
+            remaining = count
+            while remaining:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+class CachedStaticFiles(StaticFiles):
+    """``StaticFiles`` for the upload directory; see :class:`StaticFileResponse`."""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        return StaticFileResponse(str(full_path), stat_result, scope)
@@ -0,0 +1,116 @@
+"""Requests per second of the sync and async database modes under concurrency.
+
+Starts ``uvicorn app.main:app`` once per mode against a fresh SQLite file
+(``sqlite://`` vs. ``sqlite+aiosqlite://``), seeds stores through the API and
+drives ``GET /stores/`` with many concurrent clients. Needs ``httpx``. Run
+from the repository root:
+
+    python -m benchmarks.async_engine --concurrency 200 --duration 15
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = {
+    "sync": "sqlite:///{path}",
+    "async": "sqlite+aiosqlite:///{path}",
+}
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000 if ordered else 0.0
+
+def start_server(database_url: str, port: int, workdir: str) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONPATH=REPO_ROOT)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir,
+        env=env,
+    )
+
+async def wait_until_up(client, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+async def seed(client, stores: int) -> dict:
+    credentials = {"username": "bench-admin", "password": "bench-password"}
+    await client.post("/auth/register", json=dict(credentials, type="admin"))
+    token = (await client.post("/auth/login", json=credentials)).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(stores):
+        await client.post("/stores/", headers=headers, json={
+            "name": f"متجر {i}", "sector": "food", "city": "الرياض", "location": "-",
+            "address": "-", "phone": "0500000000", "email": f"s{i}@example.com",
+            "products": ["قهوة", "شاي"],
+        })
+    return headers
+
+async def drive(client, headers, concurrency: int, duration: float):
+    import httpx
+
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            began = time.perf_counter()
+            try:
+                response = await client.get("/stores/", params={"limit": 20}, headers=headers)
+            except httpx.TransportError:
+                errors += 1
+                continue
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - began)
+            else:
+                errors += 1
+
+    began = time.monotonic()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.monotonic() - began
+
+async def bench_mode(name: str, url_template: str, args, port: int):
+    import httpx
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_server(url_template.format(path=os.path.join(tmp, "bench.db")), port, tmp)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+                await wait_until_up(client)
+                headers = await seed(client, args.stores)
+                latencies, errors, elapsed = await drive(client, headers, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(
+        f"{name:>6}: {len(latencies) / elapsed:8.1f} req/s  p50 {percentile(latencies, 0.5):7.1f} ms  "
+        f"p99 {percentile(latencies, 0.99):7.1f} ms  errors {errors}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--stores", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    for offset, (name, template) in enumerate(MODES.items()):
+        asyncio.run(bench_mode(name, template, args, args.port + offset))
+
+if __name__ == "__main__":
+    main()
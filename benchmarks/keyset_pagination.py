@@ -0,0 +1,89 @@
+"""Compare OFFSET and keyset pagination on a large stores table.
+
+Seeds a throwaway SQLite database (1M stores by default) and times fetching
+deep pages of ``GET /stores`` through ``app.utils.pagination.paginate`` both
+ways. Run from the repository root:
+
+    python -m benchmarks.keyset_pagination --rows 1000000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, Store
+from app.utils.pagination import encode_cursor, paginate
+
+BATCH_SIZE = 20000
+
+def seed(session, rows: int):
+    start = datetime(2024, 1, 1)
+    for offset in range(0, rows, BATCH_SIZE):
+        session.execute(insert(Store), [
+            {
+                "id": str(uuid.uuid4()),
+                "name": f"متجر {i}",
+                "sector": "food",
+                "city": "الرياض",
+                "location": "-",
+                "address": "-",
+                "phone": "0500000000",
+                "email": f"store{i}@example.com",
+                "owner_id": None,
+                "is_active": True,
+                # Several stores per second, like a real import, so ties on created_at occur.
+                "created_at": start + timedelta(seconds=i // 4),
+            }
+            for i in range(offset, min(offset + BATCH_SIZE, rows))
+        ])
+        session.commit()
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - began)
+    return statistics.median(samples) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+
+        began = time.perf_counter()
+        seed(session, args.rows)
+        print(f"seeded {args.rows} stores in {time.perf_counter() - began:.1f}s")
+        print(f"{'page':>8} {'offset ms':>12} {'keyset ms':>12}")
+
+        for page in args.pages:
+            if (page - 1) * args.limit >= args.rows:
+                continue
+            query = session.query(Store)
+            if page == 1:
+                cursor = None
+            else:
+                previous, _ = paginate(query, Store, page - 1, args.limit)
+                cursor = encode_cursor(previous[-1])
+
+            offset_ms = timed(lambda: paginate(query, Store, page, args.limit), args.repeat)
+            keyset_ms = timed(lambda: paginate(query, Store, page, args.limit, cursor), args.repeat)
+            print(f"{page:>8} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+
+        session.close()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
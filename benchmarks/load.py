@@ -0,0 +1,246 @@
+"""Load-test the hot endpoints against synthetic data and report latency as JSON.
+
+Seeds a throwaway database with :mod:`benchmarks.synthetic` (or the database
+given by ``--database-url``, which must be empty), starts ``uvicorn
+app.main:app`` against it and drives each scenario with ``--concurrency``
+async clients for ``--duration`` seconds after a short warm-up. Each client
+draws its requests (users, filters, pages) from its own seeded RNG, so runs
+with the same arguments send the same mix and can be compared across commits.
+Needs ``httpx``. Run from the repository root:
+
+    python -m benchmarks.load --output results.json
+    python -m benchmarks.load --baseline results.json   # exit status 1 on regression
+
+A regression is a scenario whose requests per second fell, or whose p95
+latency rose, by more than ``--tolerance`` (default 15%) against the baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from benchmarks.async_engine import REPO_ROOT, percentile, start_server, wait_until_up
+from benchmarks.synthetic import seed, zipf_cum_weights
+
+SCENARIOS = ("login", "stores", "offers", "dashboard", "upload")
+UPLOAD_IMAGES = 16
+
+def png(rng: random.Random, size: int = 64) -> bytes:
+    """A small noisy RGB PNG, built without Pillow."""
+    raw = b"".join(b"\x00" + bytes(rng.getrandbits(8) for _ in range(size * 3)) for _ in range(size))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+class Workload:
+    """Requests for each scenario, drawn from a worker's RNG."""
+
+    def __init__(self, data: dict, tokens: dict, images):
+        self.data = data
+        self.tokens = tokens
+        self.images = images
+        self.owners = [username for username in tokens if username != data["admin"]] or [data["admin"]]
+        self.owner_weights = zipf_cum_weights(len(self.owners), 1.1)
+
+    def owner(self, rng) -> str:
+        # owner0 owns the most stores, so busy owners send the most requests.
+        return rng.choices(self.owners, cum_weights=self.owner_weights)[0]
+
+    def headers(self, rng):
+        username = self.data["admin"] if rng.random() < 0.3 else self.owner(rng)
+        return {"Authorization": f"Bearer {self.tokens[username]}"}
+
+    def login(self, rng):
+        return "POST", "/auth/login", {"json": {"username": self.owner(rng), "password": self.data["password"]}}
+
+    def stores(self, rng):
+        params = {"page": rng.choice([1, 1, 1, 2, 3, 5]), "limit": 20}
+        choice = rng.random()
+        if choice < 0.2:
+            params["city"] = rng.choice(self.data["cities"][:4])
+        elif choice < 0.35:
+            params["sector"] = rng.choice(self.data["sectors"])
+        elif choice < 0.5:
+            params["product"] = rng.choice(self.data["products"])
+        elif choice < 0.6:
+            params["search"] = rng.choice(["متجر", "السعادة", "الريان", "النور"])
+        return "GET", "/stores/", {"params": params, "headers": self.headers(rng)}
+
+    def offers(self, rng):
+        params = {"page": rng.choice([1, 1, 1, 2, 3, 5]), "limit": 20, "active_only": rng.random() < 0.8}
+        choice = rng.random()
+        if choice < 0.25 and self.data["store_ids"]:
+            params["store_id"] = rng.choice(self.data["store_ids"][:50])
+        elif choice < 0.35:
+            params["search"] = rng.choice(["خصم", "عرض", "قهوة", "عطور"])
+        return "GET", "/offers/", {"params": params, "headers": self.headers(rng)}
+
+    def dashboard(self, rng):
+        return "GET", "/dashboard/stats", {"headers": self.headers(rng)}
+
+    def upload(self, rng):
+        # A fixed set of images: the first upload of each is stored, repeats are deduplicated.
+        files = {"file": ("image.png", rng.choice(self.images), "image/png")}
+        return "POST", "/upload/image", {"files": files, "headers": self.headers(rng)}
+
+async def drive(client, make_request, concurrency: int, duration: float, warmup: float, seed_value: int) -> dict:
+    import httpx
+
+    latencies, errors = [], 0
+    measuring = False
+
+    async def worker(index: int, deadline: float):
+        nonlocal errors
+        rng = random.Random(seed_value * 1000 + index)
+        while time.monotonic() < deadline:
+            method, path, options = make_request(rng)
+            began = time.perf_counter()
+            try:
+                response = await client.request(method, path, **options)
+            except httpx.TransportError:
+                if measuring:
+                    errors += 1
+                continue
+            if not measuring:
+                continue
+            if response.status_code < 400:
+                latencies.append(time.perf_counter() - began)
+            else:
+                errors += 1
+
+    if warmup > 0:
+        deadline = time.monotonic() + warmup
+        await asyncio.gather(*(worker(i, deadline) for i in range(concurrency)))
+    measuring = True
+    began = time.monotonic()
+    deadline = began + duration
+    await asyncio.gather(*(worker(i, deadline) for i in range(concurrency)))
+    elapsed = time.monotonic() - began
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+async def run(args, database_url: str, data: dict, workdir: str) -> dict:
+    import httpx
+
+    server = start_server(database_url, args.port, workdir)
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60) as client:
+            await wait_until_up(client)
+            tokens = {}
+            for username in [data["admin"]] + data["owners"][:args.owners]:
+                response = await client.post("/auth/login", json={"username": username, "password": data["password"]})
+                response.raise_for_status()
+                tokens[username] = response.json()["access_token"]
+            images_rng = random.Random(args.seed)
+            workload = Workload(data, tokens, [png(images_rng) for _ in range(UPLOAD_IMAGES)])
+
+            results = {}
+            for scenario in args.scenarios:
+                results[scenario] = await drive(
+                    client, getattr(workload, scenario), args.concurrency, args.duration, args.warmup, args.seed
+                )
+                print(f"{scenario:>10}: {json.dumps(results[scenario])}", file=sys.stderr)
+            return results
+    finally:
+        server.terminate()
+        server.wait()
+
+def git_revision() -> dict:
+    def git(*command):
+        return subprocess.run(["git", *command], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Scenarios that regressed against ``baseline``, with what changed."""
+    if baseline.get("config") != results["config"]:
+        print("warning: baseline was recorded with different settings", file=sys.stderr)
+    regressions = []
+    for scenario, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if not previous:
+            continue
+        if previous["rps"] and current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{scenario}: {previous['rps']} -> {current['rps']} req/s")
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{scenario}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="empty database to seed (default: a throwaway SQLite file)")
+    parser.add_argument("--async-driver", action="store_true", help="serve the throwaway SQLite file through aiosqlite")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--stores", type=int, default=2000)
+    parser.add_argument("--offers", type=int, default=10000)
+    parser.add_argument("--subscriptions", type=int, default=1000)
+    parser.add_argument("--owners", type=int, default=20, help="owners that log in before the run and send requests")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=8775)
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    config = {
+        key: getattr(args, key)
+        for key in ("users", "stores", "offers", "subscriptions", "owners", "seed", "concurrency", "duration", "warmup")
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.database_url:
+            database_url = args.database_url
+        else:
+            driver = "sqlite+aiosqlite" if args.async_driver else "sqlite"
+            database_url = f"{driver}:///{os.path.join(tmp, 'bench.db')}"
+        began = time.perf_counter()
+        data = seed(database_url, args.users, args.stores, args.offers, args.subscriptions, args.seed)
+        print(f"seeded in {time.perf_counter() - began:.1f}s", file=sys.stderr)
+        scenarios = asyncio.run(run(args, database_url, data, tmp))
+
+    config["database"] = database_url.split(":", 1)[0]
+    results = {
+        **git_revision(),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "scenarios": scenarios,
+    }
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(report + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Concurrent login throughput, and how much it slows unrelated requests.
+
+Runs the app in-process against a throwaway SQLite database, fires
+``--logins`` logins with ``--concurrency`` in flight, and meanwhile polls
+``/health`` to show whether bcrypt work starves other endpoints. Needs
+``httpx``. Run from the repository root:
+
+    python -m benchmarks.login_throughput --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+async def run(args):
+    import httpx
+    from app.core.security import password_hasher
+    from app.main import app
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        credentials = {"username": "bench", "password": "bench-password"}
+        await client.post("/auth/register", json=dict(credentials, type="store"))
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        statuses = {}
+        done = asyncio.Event()
+
+        async def login():
+            async with semaphore:
+                response = await client.post("/auth/login", json=credentials)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def probe(latencies):
+            while not done.is_set():
+                began = time.perf_counter()
+                await client.get("/health")
+                latencies.append(time.perf_counter() - began)
+                await asyncio.sleep(0.01)
+
+        health = []
+        prober = asyncio.create_task(probe(health))
+        began = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - began
+        done.set()
+        await prober
+
+    print(f"logins: {args.logins} in {elapsed:.2f}s -> {args.logins / elapsed:.1f}/s, statuses {statuses}")
+    if health:
+        print(
+            f"/health during burst: p50 {percentile(health, 0.5):.1f} ms, "
+            f"p99 {percentile(health, 0.99):.1f} ms, max {max(health) * 1000:.1f} ms "
+            f"(median of {len(health)} probes {statistics.median(health) * 1000:.1f} ms)"
+        )
+    print(f"hasher: {password_hasher.stats()}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.chdir(tmp)
+        asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Time rendering 100-row list pages the old way and through ``app.utils.serialization``.
+
+The old path copies ``__dict__``, validates into the response model, then lets
+FastAPI validate and ``jsonable_encoder`` the result again before ``json.dumps``.
+The new path constructs the models without validation and renders them with
+orjson. No database is needed; rows are transient ORM objects. Run from the
+repository root:
+
+    python -m benchmarks.serialization --rows 100 --repeat 200
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from app.models import Offer, Store
+from app.schemas.offer import OfferListResponse, OfferResponse
+from app.schemas.store import StoreListResponse, StoreResponse
+from app.utils.serialization import offer_response, render, store_response
+
+def make_stores(rows: int):
+    now = datetime(2024, 1, 1)
+    return [
+        Store(
+            id=str(uuid.uuid4()),
+            name=f"متجر {i}",
+            sector="مطاعم",
+            city="الرياض",
+            location="-",
+            image=f"{i}.png",
+            description="وصف المتجر " * 5,
+            address="-",
+            phone="0500000000",
+            email=f"store{i}@example.com",
+            owner_id=str(uuid.uuid4()),
+            products=["قهوة", "شاي", "حلويات"],
+            is_active=True,
+            created_at=now - timedelta(minutes=i),
+        )
+        for i in range(rows)
+    ]
+
+def make_offers(rows: int):
+    now = datetime(2024, 1, 1)
+    return [
+        Offer(
+            id=str(uuid.uuid4()),
+            title=f"عرض {i}",
+            description="خصم على جميع المنتجات",
+            discount_percentage=10 + i % 50,
+            image=None,
+            valid_until=now + timedelta(days=30),
+            store_id=str(uuid.uuid4()),
+            is_active=True,
+            created_at=now - timedelta(minutes=i),
+        )
+        for i in range(rows)
+    ]
+
+def old_stores(stores):
+    responses = []
+    for store in stores:
+        store_dict = store.__dict__.copy()
+        store_dict["products"] = list(store.products)
+        if store_dict.get("image"):
+            store_dict["image"] = f"/static/{store_dict['image']}"
+        responses.append(StoreResponse(**store_dict))
+    page = StoreListResponse(stores=responses, total=len(stores), page=1, limit=len(stores))
+    # FastAPI's response_model pass: validate again, then encode.
+    return json.dumps(jsonable_encoder(StoreListResponse.model_validate(page.model_dump()))).encode()
+
+def new_stores(stores):
+    return render(StoreListResponse.model_construct(
+        stores=[store_response(store) for store in stores], total=len(stores), page=1, limit=len(stores)
+    )).body
+
+def old_offers(offers):
+    responses = []
+    for offer in offers:
+        offer_dict = OfferResponse.from_orm(offer).dict()
+        offer_dict["store_name"] = "متجر"
+        responses.append(OfferResponse(**offer_dict))
+    page = OfferListResponse(offers=responses, total=len(offers), page=1, limit=len(offers))
+    return json.dumps(jsonable_encoder(OfferListResponse.model_validate(page.model_dump()))).encode()
+
+def new_offers(offers):
+    return render(OfferListResponse.model_construct(
+        offers=[offer_response(offer, store_name="متجر") for offer in offers], total=len(offers), page=1, limit=len(offers)
+    )).body
+
+def timed(fn, rows, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn(rows)
+        samples.append(time.perf_counter() - began)
+    return statistics.median(samples) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    cases = [
+        ("stores", make_stores(args.rows), old_stores, new_stores),
+        ("offers", make_offers(args.rows), old_offers, new_offers),
+    ]
+    print(f"{'page':>8} {'old ms':>10} {'new ms':>10} {'speedup':>9}")
+    for name, rows, old, new in cases:
+        old_ms = timed(old, rows, args.repeat)
+        new_ms = timed(new, rows, args.repeat)
+        print(f"{name:>8} {old_ms:>10.3f} {new_ms:>10.3f} {old_ms / new_ms:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
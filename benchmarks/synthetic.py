@@ -0,0 +1,222 @@
+"""Seed an empty database with synthetic users, stores, offers and subscriptions.
+
+Names, descriptions, cities and products are Arabic and drawn from fixed word
+lists; store ownership, offers per store and cities are Zipf-skewed, so a few
+owners and stores carry most of the rows as in production. The same ``--seed``
+always produces the same data. Rows are bulk-inserted, then the entity
+counters are rebuilt; the search index is backfilled by the app on its next
+start. Run from the repository root:
+
+    python -m benchmarks.synthetic --database-url sqlite:///./bench.db --stores 5000 --offers 20000
+"""
+import argparse
+import itertools
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+ADMIN_USERNAME = "bench-admin"
+PASSWORD = "bench-password"
+BATCH_SIZE = 5000
+# Fixed so the data, and the pages the benchmark reads, do not depend on the day it runs.
+REFERENCE_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+CITIES = ["الرياض", "جدة", "الدمام", "مكة المكرمة", "المدينة المنورة", "الخبر", "الطائف", "أبها", "تبوك", "بريدة", "حائل", "جازان"]
+SECTORS = {
+    "مطاعم": ["مشويات", "برجر", "بيتزا", "مندي", "كبسة", "شاورما"],
+    "مقاهي": ["قهوة", "قهوة عربية", "شاي", "كيك", "كرواسون", "عصير"],
+    "ملابس": ["عبايات", "ثياب", "أحذية", "شماغ", "ملابس أطفال", "حقائب"],
+    "إلكترونيات": ["جوالات", "سماعات", "شواحن", "حواسيب", "ساعات ذكية", "كاميرات"],
+    "عطور": ["عود", "بخور", "دهن العود", "مسك", "عطور فرنسية", "معطرات"],
+    "حلويات": ["تمور", "كنافة", "بقلاوة", "شوكولاتة", "معمول", "آيس كريم"],
+    "صيدليات": ["فيتامينات", "مستحضرات تجميل", "عناية بالبشرة", "أدوية", "مكملات", "عطور"],
+    "سوبرماركت": ["خضروات", "فواكه", "ألبان", "لحوم", "مخبوزات", "قهوة"],
+}
+NAME_PREFIXES = ["متجر", "مؤسسة", "بيت", "ركن", "عالم", "دار", "أسواق", "مركز"]
+NAME_WORDS = ["السعادة", "الأمل", "النخبة", "الريان", "الواحة", "البركة", "الفجر", "الياسمين", "الخليج", "النور", "الأصالة", "الضيافة"]
+DESCRIPTION_PHRASES = [
+    "نقدم أفضل المنتجات بأسعار منافسة",
+    "خدمة توصيل سريعة داخل المدينة",
+    "جودة عالية ورضا العملاء هدفنا",
+    "فروعنا مفتوحة طوال أيام الأسبوع",
+    "تشكيلة واسعة تناسب جميع الأذواق",
+    "منتجات محلية ومستوردة",
+    "عروض حصرية لعملائنا المميزين",
+]
+OFFER_TEMPLATES = ["خصم {discount}٪ على {product}", "عرض خاص على {product}", "تخفيضات {product}", "اشتر {product} واحصل على الثاني مجاناً"]
+SUBSCRIPTION_STATUSES = (("pending", 5), ("approved", 3), ("rejected", 1))
+
+def zipf_cum_weights(count: int, exponent: float):
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+def sync_url(database_url: str) -> str:
+    """The URL with an async driver (aiosqlite, asyncpg) swapped for its sync counterpart."""
+    from app.core.database import ASYNC_DRIVERS
+
+    url = make_url(database_url)
+    if url.get_driver_name() in ASYNC_DRIVERS:
+        url = url.set(drivername=f"{url.get_backend_name()}+{ASYNC_DRIVERS[url.get_driver_name()]}")
+    return url.render_as_string(hide_password=False)
+
+class Generator:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+
+    def uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def created_at(self, days: int = 365) -> datetime:
+        return REFERENCE_TIME - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def description(self) -> str:
+        return "، ".join(self.rng.sample(DESCRIPTION_PHRASES, self.rng.randint(1, 3)))
+
+    def business(self, index: int, city_weights) -> dict:
+        sector = self.rng.choice(list(SECTORS))
+        return {
+            "name": f"{self.rng.choice(NAME_PREFIXES)} {self.rng.choice(NAME_WORDS)} {index}",
+            "sector": sector,
+            "city": self.rng.choices(CITIES, cum_weights=city_weights)[0],
+            "location": f"{self.rng.uniform(16.5, 31.5):.5f},{self.rng.uniform(36.5, 55.5):.5f}",
+            "image": None,
+            "description": self.description(),
+            "address": f"حي {self.rng.choice(NAME_WORDS)}، شارع {self.rng.randint(1, 80)}",
+            "phone": f"05{self.rng.randrange(10 ** 8):08d}",
+            "products": self.rng.sample(SECTORS[sector], self.rng.randint(1, 4)),
+        }
+
+def _insert_batches(session, model, rows):
+    for offset in range(0, len(rows), BATCH_SIZE):
+        session.execute(insert(model), rows[offset:offset + BATCH_SIZE])
+    session.commit()
+
+def seed(database_url: str, users: int = 200, stores: int = 1000, offers: int = 5000,
+         subscriptions: int = 500, random_seed: int = 42, skew: float = 1.1) -> dict:
+    """Fill the empty database at ``database_url``; returns what was created and how to log in."""
+    from app.core.counters import reconcile_counters
+    from app.core.security import get_password_hash
+    from app.models import Base, Offer, Store, StoreProduct, Subscription, SubscriptionProduct, User
+
+    engine = create_engine(sync_url(database_url))
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    if session.execute(select(func.count()).select_from(User)).scalar():
+        raise SystemExit("the database already has users; seed an empty one")
+
+    generator = Generator(random_seed)
+    rng = generator.rng
+    city_weights = zipf_cum_weights(len(CITIES), skew)
+    # One hash for everyone: the password is the same and bcrypt would dominate seeding.
+    password_hash = get_password_hash(PASSWORD)
+
+    owner_ids = [generator.uuid() for _ in range(max(1, users - 1))]
+    user_rows = [{"id": generator.uuid(), "username": ADMIN_USERNAME, "password_hash": password_hash,
+                  "type": "admin", "is_active": True, "created_at": REFERENCE_TIME - timedelta(days=400)}]
+    user_rows += [
+        {"id": owner_id, "username": f"owner{i}", "password_hash": password_hash, "type": "store",
+         "is_active": True, "created_at": generator.created_at(400)}
+        for i, owner_id in enumerate(owner_ids)
+    ]
+    _insert_batches(session, User, user_rows)
+
+    owner_weights = zipf_cum_weights(len(owner_ids), skew)
+    store_rows, store_products = [], []
+    for i in range(stores):
+        business = generator.business(i, city_weights)
+        store_id = generator.uuid()
+        products = business.pop("products")
+        store_rows.append(dict(
+            business,
+            id=store_id,
+            email=f"store{i}@example.com",
+            owner_id=rng.choices(owner_ids, cum_weights=owner_weights)[0] if rng.random() > 0.05 else None,
+            is_active=rng.random() > 0.1,
+            created_at=generator.created_at(),
+        ))
+        store_products += [{"store_id": store_id, "position": p, "name": name} for p, name in enumerate(products)]
+    _insert_batches(session, Store, store_rows)
+    _insert_batches(session, StoreProduct, store_products)
+
+    offer_rows = []
+    if store_rows:
+        store_weights = zipf_cum_weights(len(store_rows), skew)
+        for i in range(offers):
+            store = rng.choices(store_rows, cum_weights=store_weights)[0]
+            discount = rng.choice([5, 10, 15, 20, 25, 30, 40, 50, 70])
+            product = rng.choice(SECTORS[store["sector"]])
+            created_at = max(store["created_at"], generator.created_at())
+            offer_rows.append({
+                "id": generator.uuid(),
+                "title": rng.choice(OFFER_TEMPLATES).format(discount=discount, product=product),
+                "description": generator.description(),
+                "discount_percentage": discount,
+                "image": None,
+                "valid_until": created_at + timedelta(days=rng.randint(3, 120)),
+                "store_id": store["id"],
+                "is_active": rng.random() > 0.25,
+                "created_at": created_at,
+            })
+    _insert_batches(session, Offer, offer_rows)
+
+    statuses, status_weights = zip(*SUBSCRIPTION_STATUSES)
+    subscription_rows, subscription_products = [], []
+    for i in range(subscriptions):
+        business = generator.business(stores + i, city_weights)
+        subscription_id = generator.uuid()
+        products = business.pop("products")
+        subscription_rows.append(dict(
+            business,
+            id=subscription_id,
+            email=f"applicant{i}@example.com",
+            user_id=rng.choice(owner_ids) if rng.random() > 0.5 else None,
+            status=rng.choices(statuses, weights=status_weights)[0],
+            created_at=generator.created_at(90),
+        ))
+        subscription_products += [
+            {"subscription_id": subscription_id, "position": p, "name": name} for p, name in enumerate(products)
+        ]
+    _insert_batches(session, Subscription, subscription_rows)
+    _insert_batches(session, SubscriptionProduct, subscription_products)
+
+    reconcile_counters(session)
+    session.close()
+    engine.dispose()
+    return {
+        "users": len(user_rows),
+        "stores": len(store_rows),
+        "offers": len(offer_rows),
+        "subscriptions": len(subscription_rows),
+        "admin": ADMIN_USERNAME,
+        "owners": [f"owner{i}" for i in range(len(owner_ids))],
+        "password": PASSWORD,
+        "store_ids": [row["id"] for row in store_rows],
+        "cities": CITIES,
+        "sectors": list(SECTORS),
+        "products": sorted({name for names in SECTORS.values() for name in names}),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--stores", type=int, default=1000)
+    parser.add_argument("--offers", type=int, default=5000)
+    parser.add_argument("--subscriptions", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for ownership, offers and cities")
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    summary = seed(args.database_url, args.users, args.stores, args.offers, args.subscriptions, args.seed, args.skew)
+    print(
+        f"seeded {summary['users']} users, {summary['stores']} stores, {summary['offers']} offers and "
+        f"{summary['subscriptions']} subscriptions in {time.perf_counter() - began:.1f}s"
+    )
+    print(f"log in as {summary['admin']} or owner0..owner{len(summary['owners']) - 1} with {summary['password']!r}")
+
+if __name__ == "__main__":
+    main()
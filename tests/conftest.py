@@ -0,0 +1,35 @@
+import os
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix="zhwaweb-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ["UPLOAD_DIR"] = os.path.join(_workdir, "uploads")
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from tests.test_offers_queries import STORE
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    return login(client, "admin", "admin")
+
+def login(client, username, user_type="store"):
+    client.post("/auth/register", json={"username": username, "password": f"{username}-password", "type": user_type})
+    response = client.post("/auth/login", json={"username": username, "password": f"{username}-password"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture(scope="session")
+def owner_headers(client):
+    return login(client, "store-owner")
+
+@pytest.fixture(scope="session")
+def owner_store_id(client, owner_headers):
+    response = client.post("/stores/", json={**STORE, "name": "متجر المالك"}, headers=owner_headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+from sqlalchemy import text
+from app.core.database import engine
+from tests.conftest import login
+from tests.test_offers_queries import STORE
+
+OFFER = {"discount_percentage": 15, "valid_until": "2030-01-01T00:00:00"}
+
+@contextmanager
+def rejecting(event, condition):
+    """A trigger making the database refuse matching rows, as a constraint would."""
+    with engine.begin() as connection:
+        connection.execute(text(
+            f"CREATE TRIGGER reject_offer BEFORE {event} ON offers WHEN {condition} "
+            "BEGIN SELECT RAISE(ABORT, 'offer rejected by trigger'); END"
+        ))
+    try:
+        yield
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text("DROP TRIGGER reject_offer"))
+
+def admin_store(client, headers):
+    return client.post("/stores/", json={**STORE, "name": "متجر الجملة"}, headers=headers).json()["id"]
+
+def stats(client, headers):
+    return client.get("/dashboard/stats", headers=headers).json()
+
+def bulk(client, method, headers, payload):
+    response = client.request(method, "/offers/bulk", json=payload, headers=headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return body, [result["status"] for result in body["results"]]
+
+def test_bulk_create_fails_only_the_rejected_items(client, admin_headers):
+    store_id = admin_store(client, admin_headers)
+    before = stats(client, admin_headers)
+    offers = [{**OFFER, "title": title, "store_id": store_id} for title in ("أول", "مرفوض", "ثالث")]
+    offers.append({**OFFER, "title": "بلا متجر", "store_id": "missing"})
+
+    with rejecting("INSERT", "NEW.title = 'مرفوض'"):
+        body, statuses = bulk(client, "POST", admin_headers, {"offers": offers})
+
+    assert statuses == ["created", "error", "created", "error"]
+    assert body["succeeded"] == 2 and body["failed"] == 2
+    assert "offer rejected by trigger" in body["results"][1]["detail"]
+    assert body["results"][3]["detail"] == "Store not found"
+    listed = client.get("/offers/", params={"store_id": store_id}, headers=admin_headers).json()["offers"]
+    assert sorted(offer["title"] for offer in listed) == ["أول", "ثالث"]
+    assert stats(client, admin_headers)["total_offers"] == before["total_offers"] + 2
+
+def test_bulk_update_reports_duplicates_and_rejected_items(client, admin_headers):
+    store_id = admin_store(client, admin_headers)
+    body, _ = bulk(client, "POST", admin_headers, {"offers": [
+        {**OFFER, "title": f"عرض {i}", "store_id": store_id} for i in range(3)
+    ]})
+    ids = [result["id"] for result in body["results"]]
+    before = stats(client, admin_headers)
+
+    with rejecting("UPDATE", "NEW.title = 'مرفوض'"):
+        body, statuses = bulk(client, "PATCH", admin_headers, {"offers": [
+            {"id": ids[0], "title": "محدث", "is_active": False},
+            {"id": ids[1], "title": "مرفوض", "is_active": False},
+            {"id": ids[0], "title": "مكرر"},
+            {"id": "missing", "title": "مفقود"},
+        ]})
+
+    assert statuses == ["updated", "error", "error", "error"]
+    assert "offer rejected by trigger" in body["results"][1]["detail"]
+    assert body["results"][2]["detail"] == "Duplicate offer id in request"
+    assert body["results"][3]["detail"] == "Offer not found"
+    assert client.get(f"/offers/{ids[0]}", headers=admin_headers).json()["title"] == "محدث"
+    assert client.get(f"/offers/{ids[1]}", headers=admin_headers).json()["is_active"] is True
+    assert stats(client, admin_headers)["active_offers"] == before["active_offers"] - 1
+
+def test_bulk_update_rejects_null_for_required_columns(client, admin_headers):
+    response = client.patch("/offers/bulk", json={"offers": [{"id": "any", "title": None}]}, headers=admin_headers)
+    assert response.status_code == 422
+    response = client.post("/offers/bulk", json={"offers": [{**OFFER, "title": None, "store_id": "any"}]}, headers=admin_headers)
+    assert response.status_code == 422
+
+def test_bulk_delete_keeps_rejected_and_foreign_offers(client, admin_headers, owner_headers, owner_store_id):
+    store_id = admin_store(client, admin_headers)
+    body, _ = bulk(client, "POST", admin_headers, {"offers": [
+        {**OFFER, "title": title, "store_id": store_id} for title in ("يحذف", "محمي")
+    ]})
+    ids = [result["id"] for result in body["results"]]
+    body, _ = bulk(client, "POST", owner_headers, {"offers": [{**OFFER, "title": "للمالك", "store_id": owner_store_id}]})
+    owner_offer = body["results"][0]["id"]
+    before = stats(client, admin_headers)
+
+    other_headers = login(client, "other-owner")
+    body, statuses = bulk(client, "DELETE", other_headers, {"ids": [owner_offer, ids[0]]})
+    assert statuses == ["error", "error"]
+    assert {result["detail"] for result in body["results"]} == {"Not enough permissions"}
+
+    with rejecting("DELETE", "OLD.title = 'محمي'"):
+        body, statuses = bulk(client, "DELETE", admin_headers, {"ids": ids + [ids[0]]})
+
+    assert statuses == ["deleted", "error", "error"]
+    assert "offer rejected by trigger" in body["results"][1]["detail"]
+    assert body["results"][2]["detail"] == "Duplicate offer id in request"
+    assert client.get(f"/offers/{ids[0]}", headers=admin_headers).status_code == 404
+    assert client.get(f"/offers/{ids[1]}", headers=admin_headers).status_code == 200
+    assert client.get(f"/offers/{owner_offer}", headers=owner_headers).status_code == 200
+    assert stats(client, admin_headers)["total_offers"] == before["total_offers"] - 1
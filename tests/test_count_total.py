@@ -0,0 +1,27 @@
+from tests.test_pagination import create_stores
+
+def total(client, headers, mode):
+    response = client.get("/stores/", params={"city": "نجران", "total_mode": mode}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["total"]
+
+def test_exact_total_is_fresh_after_writes(client, admin_headers):
+    create_stores(client, admin_headers, "نجران", 2)
+    assert total(client, admin_headers, "exact") == 2
+    create_stores(client, admin_headers, "نجران", 1)
+    assert total(client, admin_headers, "exact") == 3
+
+def test_estimate_serves_the_longer_lived_count(client, admin_headers):
+    assert total(client, admin_headers, "exact") == 3
+    create_stores(client, admin_headers, "نجران", 1)
+    # SQLite has no planner estimate: the last count stands until its TTL runs out.
+    assert total(client, admin_headers, "estimate") == 3
+    assert total(client, admin_headers, "exact") == 4
+    assert total(client, admin_headers, "estimate") == 4
+
+def test_none_skips_the_count(client, admin_headers):
+    assert total(client, admin_headers, "none") is None
+
+def test_unknown_total_mode_is_rejected(client, admin_headers):
+    response = client.get("/stores/", params={"total_mode": "approximate"}, headers=admin_headers)
+    assert response.status_code == 422
@@ -0,0 +1,73 @@
+import sqlite3
+import uuid
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.core.counters import GLOBAL_SCOPE, adjust_counters, compute_counters, ensure_counters, read_counters
+from app.core.database import SessionLocal, engine
+from app.models import EntityCounter
+from tests.test_offers_queries import STORE, count_statements
+
+def test_adjust_counters_upserts_each_scope_in_one_statement():
+    owner_id = str(uuid.uuid4())
+    with SessionLocal() as db:
+        with count_statements() as statements:
+            adjust_counters(db, owner_id, include_global=False, total_stores=1, active_stores=1)
+        assert len(statements) == 1
+        adjust_counters(db, owner_id, include_global=False, total_stores=2, active_offers=3)
+        db.commit()
+        assert read_counters(db, owner_id) == {
+            "total_stores": 3, "active_stores": 1, "total_offers": 0, "active_offers": 3,
+        }
+        db.query(EntityCounter).filter(EntityCounter.scope == owner_id).delete()
+        db.commit()
+
+def test_ensure_counters_rebuilds_missing_global_row(client):
+    with SessionLocal() as db:
+        db.query(EntityCounter).filter(EntityCounter.scope == GLOBAL_SCOPE).delete()
+        db.commit()
+        ensure_counters(db)
+        assert read_counters(db) == compute_counters(db)[GLOBAL_SCOPE]
+
+        db.query(EntityCounter).filter(EntityCounter.scope == GLOBAL_SCOPE).update({"total_stores": -1})
+        db.commit()
+        ensure_counters(db)
+        assert read_counters(db)["total_stores"] == -1
+        db.query(EntityCounter).filter(EntityCounter.scope == GLOBAL_SCOPE).update(
+            {"total_stores": compute_counters(db)[GLOBAL_SCOPE]["total_stores"]}
+        )
+        db.commit()
+
+def test_ensure_counters_skips_rebuild_while_another_worker_holds_the_lock(client):
+    with SessionLocal() as db:
+        db.query(EntityCounter).filter(EntityCounter.scope == GLOBAL_SCOPE).delete()
+        db.commit()
+
+    # Another worker mid-rebuild: its write lock outlasts this worker's busy timeout.
+    holder = sqlite3.connect(engine.url.database, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    impatient = create_engine(engine.url, connect_args={"timeout": 0.05})
+    try:
+        with Session(impatient) as db:
+            ensure_counters(db)
+    finally:
+        holder.rollback()
+        holder.close()
+        impatient.dispose()
+
+    with SessionLocal() as db:
+        assert db.get(EntityCounter, GLOBAL_SCOPE) is None
+        ensure_counters(db)
+        assert read_counters(db) == compute_counters(db)[GLOBAL_SCOPE]
+
+def test_dashboard_stats_follow_writes(client, admin_headers):
+    def stats():
+        response = client.get("/dashboard/stats", headers=admin_headers)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    before = stats()
+    assert stats() == before
+    store_id = client.post("/stores/", json=STORE, headers=admin_headers).json()["id"]
+    assert stats()["total_stores"] == before["total_stores"] + 1
+    client.delete(f"/stores/{store_id}", headers=admin_headers)
+    assert stats()["total_stores"] == before["total_stores"]
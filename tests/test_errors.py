@@ -0,0 +1,13 @@
+def test_unauthorized_response_keeps_www_authenticate(client):
+    response = client.get("/stores/", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+    assert response.json()["message"] == "Could not validate credentials"
+
+def test_busy_hasher_response_keeps_retry_after(client, admin_headers, monkeypatch):
+    from app.core.security import password_hasher
+
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    response = client.post("/auth/login", json={"username": "admin", "password": "admin-password"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+from app.core.config import settings
+from app.schemas import StoreResponse
+from tests.test_offers_queries import STORE, create_offers
+
+def export(client, headers, path, **params):
+    response = client.get(path, params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response, response.content
+
+def test_csv_export_spans_batches(client, admin_headers, monkeypatch):
+    # Five rows over batches of two: the page boundaries must not drop or repeat rows.
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+    for i in range(5):
+        store = {**STORE, "name": f"متجر {i}", "city": "تبوك", "products": ["قهوة, مختصة", "شاي; أخضر"]}
+        assert client.post("/stores/", json=store, headers=admin_headers).status_code == 200
+
+    response, body = export(client, admin_headers, "/stores/export", format="csv", city="تبوك")
+    assert response.headers["content-type"].startswith("text/csv")
+    assert body.startswith("\ufeff".encode("utf-8"))
+    rows = list(csv.reader(io.StringIO(body.decode("utf-8-sig"))))
+    assert rows[0] == list(StoreResponse.model_fields)
+    assert len(rows) == 1 + 5
+    products = rows[1][rows[0].index("products")]
+    assert json.loads(products) == ["قهوة, مختصة", "شاي; أخضر"]
+
+def test_ndjson_export_is_owner_scoped(client, admin_headers, owner_headers, owner_store_id, monkeypatch):
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+    admin_store_id = client.post("/stores/", json=STORE, headers=admin_headers).json()["id"]
+    create_offers(client, admin_headers, admin_store_id, 2)
+    create_offers(client, owner_headers, owner_store_id, 3)
+
+    _, body = export(client, owner_headers, "/offers/export")
+    lines = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+    assert {line["store_id"] for line in lines} == {owner_store_id}
+    assert len(lines) == len({line["id"] for line in lines}) >= 3
+
+    _, body = export(client, admin_headers, "/offers/export", store_id=admin_store_id)
+    assert len(body.decode("utf-8").splitlines()) == 2
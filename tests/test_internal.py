@@ -0,0 +1,18 @@
+def test_cache_stats_count_token_hits(client, admin_headers):
+    before = client.get("/internal/caches", headers=admin_headers).json()
+    client.get("/stores/", headers=admin_headers)
+    after = client.get("/internal/caches", headers=admin_headers).json()
+    assert set(after) == {"token", "principal", "dashboard"}
+    assert after["token"]["hits"] > before["token"]["hits"]
+
+def test_cache_stats_require_admin(client):
+    client.post("/auth/register", json={"username": "stats-owner", "password": "owner-password", "type": "store"})
+    token = client.post("/auth/login", json={"username": "stats-owner", "password": "owner-password"}).json()["access_token"]
+    response = client.get("/internal/caches", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+
+def test_pool_status_includes_password_hasher(client, admin_headers):
+    status = client.get("/internal/pool", headers=admin_headers).json()
+    assert "sync" in status
+    assert status["password_hasher"]["completed"] >= 1
+    assert status["password_hasher"]["pending"] == 0
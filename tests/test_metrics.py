@@ -0,0 +1,26 @@
+from app.core.config import settings
+
+def test_metrics_need_the_configured_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_token", None)
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+def test_metrics_record_requests_by_route(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    response = client.get("/stores/", headers=admin_headers)
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert 'db;desc="' in timing
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    labels = 'method="GET",route="/stores/",status="200"'
+    assert any(line.startswith(f"http_request_duration_seconds_count{{{labels}}}") for line in lines)
+    assert any(line.startswith(f"http_request_db_statements_bucket{{{labels},le=") for line in lines)
+    assert any(line.startswith("db_statement_duration_seconds_count") for line in lines)
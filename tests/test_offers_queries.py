@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from app.core.database import engine
+
+STORE = {
+    "name": "متجر الاختبار",
+    "sector": "مطاعم",
+    "city": "الرياض",
+    "location": "24.7,46.7",
+    "address": "حي النور",
+    "phone": "0500000000",
+    "email": "queries@example.com",
+    "products": ["قهوة"],
+}
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def create_offers(client, headers, store_id, count):
+    for i in range(count):
+        response = client.post("/offers/", headers=headers, json={
+            "title": f"عرض {i}",
+            "discount_percentage": 10,
+            "valid_until": "2030-01-01T00:00:00",
+            "store_id": store_id,
+        })
+        assert response.status_code == 200, response.text
+
+def test_offer_listing_statement_count_is_constant(client, admin_headers):
+    store_id = client.post("/stores/", json=STORE, headers=admin_headers).json()["id"]
+    create_offers(client, admin_headers, store_id, 3)
+
+    with count_statements() as statements:
+        response = client.get("/offers/", params={"store_id": store_id}, headers=admin_headers)
+    assert response.status_code == 200
+    assert len(response.json()["offers"]) == 3
+    # COUNT(*) and the page itself, with the store name joined in.
+    assert len(statements) <= 2, statements
+
+    create_offers(client, admin_headers, store_id, 5)
+    with count_statements() as statements:
+        response = client.get("/offers/", params={"store_id": store_id, "limit": 50}, headers=admin_headers)
+    assert len(response.json()["offers"]) == 8
+    assert len(statements) <= 2, statements
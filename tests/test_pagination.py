@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from app.core.database import SessionLocal
+from app.models import Store
+from tests.test_offers_queries import STORE
+
+def create_stores(client, headers, city, count):
+    for i in range(count):
+        store = dict(STORE, name=f"متجر {city} {i}", city=city, email=f"{city}{i}@example.com")
+        response = client.post("/stores/", json=store, headers=headers)
+        assert response.status_code == 200, response.text
+
+def test_empty_cursor_pages_by_offset(client, admin_headers):
+    create_stores(client, admin_headers, "تبوك", 5)
+    params = {"city": "تبوك", "limit": 2, "page": 2}
+
+    expected = client.get("/stores/", params=params, headers=admin_headers).json()
+    response = client.get("/stores/", params=dict(params, cursor=""), headers=admin_headers)
+    assert response.status_code == 200
+    assert [store["id"] for store in response.json()["stores"]] == [store["id"] for store in expected["stores"]]
+
+    first = client.get("/stores/", params=dict(params, page=1), headers=admin_headers).json()
+    assert {store["id"] for store in first["stores"]}.isdisjoint(store["id"] for store in expected["stores"])
+
+def insert_stores_at(city, count, created_at):
+    """Stores sharing one ``created_at``, so only the id orders them."""
+    with SessionLocal() as db:
+        stores = [
+            Store(name=f"متجر {city} {i}", sector="مطاعم", city=city, location="24.7,46.7", address="حي النور",
+                  phone="0500000000", email=f"{city}{i}@example.com", created_at=created_at)
+            for i in range(count)
+        ]
+        db.add_all(stores)
+        db.commit()
+        return {store.id for store in stores}
+
+def follow_cursors(client, headers, params, between_pages=None):
+    pages, cursor = [], None
+    while True:
+        response = client.get("/stores/", params=dict(params, cursor=cursor or ""), headers=headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        pages.append([store["id"] for store in body["stores"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+        if between_pages:
+            between_pages(pages[-1])
+
+def test_cursor_walk_with_equal_timestamps_has_no_gaps(client, admin_headers):
+    expected = insert_stores_at("ينبع", 7, datetime(2023, 5, 1, 12, 0, tzinfo=timezone.utc))
+
+    pages = follow_cursors(client, admin_headers, {"city": "ينبع", "limit": 3})
+    seen = [store_id for page in pages for store_id in page]
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert len(seen) == len(set(seen))
+    assert set(seen) == expected
+    assert seen == sorted(seen, reverse=True)
+
+def test_cursor_survives_deleted_anchor(client, admin_headers):
+    expected = insert_stores_at("الجبيل", 7, datetime(2023, 6, 1, 12, 0, tzinfo=timezone.utc))
+    deleted = set()
+
+    def delete_anchor(page):
+        # The cursor points at the last row of the page just read.
+        response = client.delete(f"/stores/{page[-1]}", headers=admin_headers)
+        assert response.status_code == 200, response.text
+        deleted.add(page[-1])
+
+    pages = follow_cursors(client, admin_headers, {"city": "الجبيل", "limit": 2}, delete_anchor)
+    seen = [store_id for page in pages for store_id in page]
+    assert len(seen) == len(set(seen))
+    assert set(seen) == expected
+    assert deleted and deleted < set(seen)
@@ -0,0 +1,21 @@
+from app.core.database import SessionLocal
+from app.core.security import get_principal, principal_cache
+from app.models import User
+
+def test_principal_evicted_only_after_commit(client):
+    client.post("/auth/register", json={"username": "cached-owner", "password": "owner-password", "type": "store"})
+    with SessionLocal() as db:
+        assert get_principal(db, "cached-owner").is_active is True
+        assert principal_cache.get("cached-owner") is not None
+
+        user = db.query(User).filter(User.username == "cached-owner").one()
+        user.is_active = False
+        db.flush()
+        assert principal_cache.get("cached-owner") is not None
+        db.rollback()
+        assert principal_cache.get("cached-owner") is not None
+
+        user.is_active = False
+        db.commit()
+        assert principal_cache.get("cached-owner") is None
+        assert get_principal(db, "cached-owner").is_active is False
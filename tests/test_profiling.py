@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import asyncpg
+from app.core import metrics, profiling
+from app.core.config import settings
+from app.core.database import engine
+from app.models import Store
+
+def test_profiles_async_endpoint_when_alone(client, admin_headers):
+    body = client.get("/stores/", params={"profile": 1}, headers=admin_headers).json()
+    assert body["profile_note"] is None
+    assert "function calls" in body["profile"]
+
+def test_skips_async_profile_while_other_requests_run(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(profiling, "_in_flight", 1)
+    body = client.get("/stores/", params={"profile": 1}, headers=admin_headers).json()
+    assert body["profile_note"] == profiling.BUSY_NOTE
+    assert body["profile"] == ""
+    assert body["statement_count"] >= 1
+
+def test_compile_for_uses_the_target_dialect_placeholders():
+    query = select(Store.id).where(Store.city == "جدة", Store.id.in_(["a", "b"]))
+    statement, parameters = profiling.compile_for(postgresql.psycopg2.dialect(), query)
+    assert "%(city_1)s" in statement and "$1" not in statement
+    assert parameters["city_1"] == "جدة"
+    statement, parameters = profiling.compile_for(asyncpg.dialect(), query)
+    assert "$1" in statement
+    assert parameters == ("جدة", "a", "b")
+
+def test_slow_query_from_async_engine_is_explained(caplog, monkeypatch):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    monkeypatch.setattr(settings, "slow_query_seconds", 1e-9)
+    monkeypatch.setattr(settings, "slow_query_explain", True)
+    async_engine = create_async_engine(engine.url.set(drivername="sqlite+aiosqlite"))
+    metrics.instrument_engine(async_engine.sync_engine)
+    profiling.instrument_engine(async_engine.sync_engine)
+
+    async def run():
+        async with async_engine.connect() as connection:
+            await connection.execute(select(Store.id).where(Store.city == "حائل"))
+        await async_engine.dispose()
+
+    profiling._explained.clear()
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        asyncio.run(run())
+        profiling._explainer.submit(lambda: None).result()
+    assert any(record.getMessage().startswith("Plan of slow query") for record in caplog.records)
+    assert not any("Could not explain" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,58 @@
+import pytest
+from app.core.database import SessionLocal, engine
+from app.core.search import MemoryBackend, search_index
+from app.models import Store
+
+@pytest.fixture
+def memory_backend():
+    backend = MemoryBackend()
+    backend.install(engine, search_index.documents)
+    previous, search_index.backend = search_index.backend, backend
+    try:
+        yield backend
+    finally:
+        search_index.backend = previous
+
+def new_store(name):
+    return Store(name=name, sector="مقاهي", city="جدة", location="21.5,39.2", address="حي الشاطئ",
+                 phone="0500000001", email="memory@example.com")
+
+def matches(db, term):
+    query, _ = search_index.search(db.query(Store.id), Store, term)
+    return {row.id for row in query}
+
+def test_memory_index_follows_commit_and_rollback(memory_backend):
+    with SessionLocal() as db:
+        store = new_store("مقهى الزعفران")
+        db.add(store)
+        db.flush()
+        assert matches(db, "الزعفران") == set()
+        db.rollback()
+        assert matches(db, "الزعفران") == set()
+
+        store = new_store("مقهى الزعفران")
+        db.add(store)
+        db.commit()
+        assert matches(db, "الزعفران") == {store.id}
+
+        db.delete(store)
+        db.flush()
+        db.rollback()
+        assert matches(db, "الزعفران") == {store.id}
+
+        db.delete(store)
+        db.commit()
+        assert matches(db, "الزعفران") == set()
+        assert store.id not in memory_backend._documents["stores"]
+
+def test_memory_search_returns_every_match(memory_backend):
+    with SessionLocal() as db:
+        stores = [new_store(f"كافيه الهيل {i}") for i in range(1500)]
+        db.add_all(stores)
+        db.commit()
+        assert matches(db, "الهيل") == {store.id for store in stores}
+        query, rank = search_index.search(db.query(Store.id), Store, "الهيل")
+        assert query.count() == 1500
+        db.query(Store).filter(Store.id.in_([store.id for store in stores])).delete(synchronize_session=False)
+        search_index.remove_ids(db, Store, [store.id for store in stores])
+        db.commit()
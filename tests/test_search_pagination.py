@@ -0,0 +1,47 @@
+from tests.test_offers_queries import STORE
+
+def walk(client, headers, path, key, params):
+    """Every id of a listing, following ``next_cursor`` when given and ``page`` otherwise."""
+    seen, page, cursor = [], 1, None
+    for _ in range(20):
+        response = client.get(path, params=dict(params, page=page, cursor=cursor or ""), headers=headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        seen += [item["id"] for item in body[key]]
+        if body["next_cursor"]:
+            cursor = body["next_cursor"]
+        elif cursor or len(body[key]) < params["limit"]:
+            return seen, body["total"]
+        else:
+            page += 1
+    raise AssertionError(f"{path} did not run out of pages")
+
+def test_ranked_store_search_visits_every_match_once(client, admin_headers):
+    expected = set()
+    for i in range(7):
+        # Repeating the term varies the relevance, so rank order differs from creation order.
+        name = " ".join(["الواحة"] * (1 + i % 3)) + f" فرع {i}"
+        store = dict(STORE, name=name, email=f"oasis{i}@example.com")
+        expected.add(client.post("/stores/", json=store, headers=admin_headers).json()["id"])
+
+    seen, total = walk(client, admin_headers, "/stores/", "stores", {"search": "الواحة", "limit": 2})
+    assert len(seen) == len(set(seen))
+    assert set(seen) == expected
+    assert total == len(expected)
+
+def test_ranked_offer_search_visits_every_match_once(client, admin_headers):
+    store_id = client.post("/stores/", json=dict(STORE, email="ranked-offers@example.com"), headers=admin_headers).json()["id"]
+    expected = set()
+    for i in range(7):
+        offer = {
+            "title": " ".join(["كنافة"] * (1 + i % 3)),
+            "discount_percentage": 10,
+            "valid_until": "2030-01-01T00:00:00",
+            "store_id": store_id,
+        }
+        expected.add(client.post("/offers/", json=offer, headers=admin_headers).json()["id"])
+
+    seen, total = walk(client, admin_headers, "/offers/", "offers", {"search": "كنافة", "limit": 3})
+    assert len(seen) == len(set(seen))
+    assert set(seen) == expected
+    assert total == len(expected)
@@ -0,0 +1,102 @@
+from urllib.parse import parse_qs, urlsplit
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.storage import IMMUTABLE, LocalStorage, S3Storage
+from app.main import mount_static
+
+MiB = 1024 * 1024
+
+@pytest.fixture
+def s3_storage(monkeypatch):
+    # boto3 is only needed for the s3 backend; moto stands in for the bucket.
+    boto3 = pytest.importorskip("boto3")
+    mock_aws = pytest.importorskip("moto").mock_aws
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(name, "testing")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="uploads")
+        yield S3Storage("uploads", "media", client=client)
+
+@pytest.fixture(params=["local", "s3"])
+def backend(request, tmp_path):
+    if request.param == "local":
+        return LocalStorage(str(tmp_path))
+    return request.getfixturevalue("s3_storage")
+
+def write(backend, name, chunks):
+    writer = backend.writer()
+    for chunk in chunks:
+        writer.write(chunk)
+    return writer.commit(name)
+
+def read(backend, name):
+    if isinstance(backend, LocalStorage):
+        with open(backend.path(name), "rb") as stored:
+            return stored.read()
+    return backend.client.get_object(Bucket=backend.bucket, Key=backend.key(name))["Body"].read()
+
+def names(backend):
+    return {name for name, _ in backend.list()}
+
+def test_write_is_visible_once_committed(backend):
+    assert write(backend, "a.png", [b"\x89PNG", b"body"])
+    assert backend.exists("a.png")
+    assert backend.modified_at("a.png") is not None
+    assert read(backend, "a.png") == b"\x89PNGbody"
+    # Same name again: the stored blob wins and the copy is dropped.
+    assert not write(backend, "a.png", [b"\x89PNGbody"])
+    assert names(backend) == {"a.png"}
+
+def test_write_above_part_size(backend, monkeypatch):
+    monkeypatch.setattr(settings, "s3_part_size", 5 * MiB)
+    chunks = [bytes([i]) * MiB for i in range(11)]
+    assert write(backend, "large.png", chunks)
+    assert read(backend, "large.png") == b"".join(chunks)
+    assert names(backend) == {"large.png"}
+    if isinstance(backend, S3Storage):
+        head = backend.client.head_object(Bucket=backend.bucket, Key=backend.key("large.png"))
+        assert head["ContentType"] == "image/png"
+        assert head["CacheControl"] == IMMUTABLE
+        assert not backend.client.list_multipart_uploads(Bucket=backend.bucket).get("Uploads")
+
+def test_aborted_write_leaves_nothing(backend, monkeypatch):
+    monkeypatch.setattr(settings, "s3_part_size", 5 * MiB)
+    writer = backend.writer()
+    for _ in range(6):
+        writer.write(b"\0" * MiB)
+    writer.abort()
+    assert names(backend) == set()
+    if isinstance(backend, S3Storage):
+        assert not backend.client.list_multipart_uploads(Bucket=backend.bucket).get("Uploads")
+
+def test_delete(backend):
+    write(backend, "gone.png", [b"x"])
+    assert backend.delete("gone.png")
+    assert not backend.exists("gone.png")
+    assert backend.modified_at("gone.png") is None
+    assert not backend.delete("gone.png")
+
+def test_local_url_is_served_by_the_app(tmp_path):
+    assert LocalStorage(str(tmp_path)).url("a.png") == "/static/a.png"
+
+def test_s3_url_is_presigned_without_public_url(s3_storage, monkeypatch):
+    monkeypatch.setattr(settings, "s3_public_url", None)
+    url = urlsplit(s3_storage.url("a.png"))
+    assert url.path.endswith("/media/a.png")
+    # SigV2 or SigV4 depending on the client's configuration.
+    assert {"Signature", "X-Amz-Signature"} & set(parse_qs(url.query))
+
+def test_s3_url_uses_public_url(s3_storage, monkeypatch):
+    monkeypatch.setattr(settings, "s3_public_url", "https://cdn.example.com/")
+    assert s3_storage.url("a.png") == "https://cdn.example.com/media/a.png"
+
+def test_static_redirects_to_the_bucket(s3_storage, monkeypatch):
+    monkeypatch.setattr(settings, "s3_public_url", "https://cdn.example.com")
+    app = FastAPI()
+    mount_static(app, s3_storage)
+    response = TestClient(app).get("/static/a.png", follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"] == "https://cdn.example.com/media/a.png"
@@ -0,0 +1,31 @@
+from tests.test_offers_queries import STORE
+
+def create_store(client, headers, products):
+    response = client.post("/stores/", json={**STORE, "city": "أبها", "products": products}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def listed_ids(client, headers, **params):
+    response = client.get("/stores/", params={"city": "أبها", "limit": 100, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return {store["id"] for store in response.json()["stores"]}
+
+def test_product_filter_matches_whole_product_names(client, admin_headers):
+    coffee = create_store(client, admin_headers, ["قهوة", "شاي"])["id"]
+    tea = create_store(client, admin_headers, ["شاي"])["id"]
+    create_store(client, admin_headers, ["قهوة عربية"])
+
+    assert listed_ids(client, admin_headers, product="قهوة") == {coffee}
+    assert listed_ids(client, admin_headers, product="شاي") == {coffee, tea}
+    assert listed_ids(client, admin_headers, product="عصير") == set()
+
+def test_update_keeps_product_order(client, admin_headers):
+    store_id = create_store(client, admin_headers, ["تمر", "قهوة", "بن"])["id"]
+    assert client.get(f"/stores/{store_id}", headers=admin_headers).json()["products"] == ["تمر", "قهوة", "بن"]
+
+    response = client.put(f"/stores/{store_id}", json={"products": ["بن", "هيل", "تمر"]}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["products"] == ["بن", "هيل", "تمر"]
+    assert client.get(f"/stores/{store_id}", headers=admin_headers).json()["products"] == ["بن", "هيل", "تمر"]
+    assert store_id in listed_ids(client, admin_headers, product="هيل")
+    assert store_id not in listed_ids(client, admin_headers, product="قهوة")
@@ -0,0 +1,50 @@
+from tests.conftest import login
+
+SUBSCRIPTION = {
+    "name": "اشتراك",
+    "sector": "مطاعم",
+    "city": "الدمام",
+    "location": "26.4,50.1",
+    "address": "حي الشاطئ",
+    "phone": "0550000000",
+    "products": ["قهوة"],
+}
+
+def create_subscriptions(client, count, prefix):
+    ids = []
+    for i in range(count):
+        response = client.post("/subscriptions/", json={**SUBSCRIPTION, "email": f"{prefix}{i}@example.com"})
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+def test_batch_approves_pending_and_explains_skips(client, admin_headers):
+    pending, done = create_subscriptions(client, 2, "batch-pending-"), create_subscriptions(client, 1, "batch-done-")
+    assert client.put(f"/subscriptions/{done[0]}/reject", headers=admin_headers).status_code == 200
+
+    response = client.put("/subscriptions/batch-status", headers=admin_headers, json={
+        "ids": pending + done + ["missing", pending[0]], "status": "approved",
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["status"] == "approved"
+    assert body["updated"] == pending
+    assert body["skipped"] == [
+        {"id": done[0], "reason": "Subscription is rejected, not pending"},
+        {"id": "missing", "reason": "Subscription not found"},
+    ]
+    for subscription_id in pending:
+        assert client.get(f"/subscriptions/{subscription_id}", headers=admin_headers).json()["status"] == "approved"
+
+def test_batch_status_is_admin_only(client):
+    ids = create_subscriptions(client, 1, "batch-owner-")
+    response = client.put("/subscriptions/batch-status", headers=login(client, "batch-owner"), json={
+        "ids": ids, "status": "approved",
+    })
+    assert response.status_code == 403
+
+def test_batch_status_is_not_routed_as_a_subscription_id(client, admin_headers):
+    response = client.put("/subscriptions/batch-status", headers=admin_headers, json={"name": "x"})
+    # The batch schema rejects the body; PUT /{subscription_id} would have answered 404.
+    assert response.status_code == 422
+    assert {error["loc"][-1] for error in response.json()["detail"]} >= {"ids", "status"}
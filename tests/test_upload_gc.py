@@ -0,0 +1,49 @@
+import os
+import time
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.utils.helpers import collect_orphaned_uploads
+from tests.test_offers_queries import STORE
+from tests.test_upload import png_bytes, upload
+
+def stored(filename):
+    return os.path.exists(os.path.join(settings.upload_dir, filename))
+
+def age(filename):
+    """Move ``filename`` out of the upload grace period."""
+    past = time.time() - settings.upload_gc_grace_seconds - 60
+    os.utime(os.path.join(settings.upload_dir, filename), (past, past))
+
+def test_shared_image_outlives_one_of_its_offers(client, admin_headers):
+    filename = upload(client, admin_headers, png_bytes("green")).json()["filename"]
+    age(filename)
+    store_id = client.post("/stores/", json=STORE, headers=admin_headers).json()["id"]
+    offer_ids = [
+        client.post("/offers/", headers=admin_headers, json={
+            "title": f"عرض مصور {i}",
+            "discount_percentage": 20,
+            "valid_until": "2030-01-01T00:00:00",
+            "store_id": store_id,
+            "image": filename,
+        }).json()["id"]
+        for i in range(2)
+    ]
+
+    assert client.delete(f"/offers/{offer_ids[0]}", headers=admin_headers).status_code == 200
+    assert stored(filename)
+    assert client.delete(f"/offers/{offer_ids[1]}", headers=admin_headers).status_code == 200
+    assert not stored(filename)
+
+def test_gc_collects_only_orphans_past_the_grace_period(client, admin_headers):
+    old = upload(client, admin_headers, png_bytes("yellow")).json()["filename"]
+    fresh = upload(client, admin_headers, png_bytes("purple")).json()["filename"]
+    age(old)
+
+    with SessionLocal() as db:
+        assert old in collect_orphaned_uploads(db, dry_run=True)
+        assert stored(old)
+        orphans = collect_orphaned_uploads(db)
+
+    assert old in orphans and fresh not in orphans
+    assert not stored(old)
+    assert stored(fresh)